@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+#
+# Synthetic tweet-like corpus in Galician and Spanish, with mentions,
+# hashtags, links, emoji, numbers, punctuation and inflected words
+# The same seed always gives the same texts
+#
+# Run from the root folder of the repository:
+#   python benchmarks/corpus.py --texts 1000 > corpus.txt
+#
+
+import argparse
+import random
+
+
+GL_WORDS = [
+    "casa", "cantiga", "neoloxismo", "palabra", "lingua", "mar", "rúa", "xente",
+    "cidade", "vila", "noite", "mañá", "tempo", "chuvia", "festa", "música",
+    "escola", "libro", "árbore", "camiño", "traballo", "amizade", "país", "fame",
+    "tuíte", "rede", "móbil", "ordenador", "xornal", "ensino", "saúde", "verán",
+    "galego", "fermoso", "novo", "vello", "grande", "pequeno", "bonito", "triste",
+    "cantar", "falar", "escribir", "ler", "comer", "durmir", "saír", "chegar",
+    "que", "de", "o", "a", "os", "as", "en", "non", "moi", "xa", "tamén", "pero",
+]
+
+ES_WORDS = [
+    "casa", "canción", "palabra", "lengua", "mar", "calle", "gente", "ciudad",
+    "pueblo", "noche", "mañana", "tiempo", "lluvia", "fiesta", "música", "escuela",
+    "libro", "árbol", "camino", "trabajo", "amistad", "país", "hambre", "red",
+    "móvil", "periódico", "salud", "verano", "hermoso", "nuevo", "viejo", "grande",
+    "pequeño", "bonito", "triste", "cantar", "hablar", "escribir", "leer", "comer",
+    "dormir", "salir", "llegar", "que", "de", "el", "la", "los", "las", "en", "no",
+    "muy", "ya", "también", "pero", "María", "José", "García", "Pérez", "Coruña",
+]
+
+# inflections the stemmer has to undo
+SUFFIXES = ["", "", "", "s", "es", "iña", "iños", "ando", "endo", "ción", "mente", "ísimo", "aba", "ades"]
+
+MENTIONS = ["@usuaria", "@xurxodiz", "@RAGalega", "@fulano_99", "@a"]
+HASHTAGS = ["#NeoloxismoDoAno", "#galego", "#Coruña", "#venres", "#tbt"]
+URLS = ["https://t.co/a1b2c3", "http://example.org/path?q=1", "https://gal.wiki/Casa"]
+EMOJI = ["\U0001F600", "\U0001F44D", "❤️", "\U0001F1EA\U0001F1F8", "\U0001F602\U0001F602"]
+NUMBERS = ["2017", "1.000", "3,5", "12", "º", "ª"]
+PUNCT = [",", ".", "!", "!!", "?", "...", ":", ";", "'", "-", "\"", "(", ")"]
+
+
+def word(rnd):
+    w = rnd.choice(GL_WORDS if rnd.random() < 0.6 else ES_WORDS)
+    w += rnd.choice(SUFFIXES)
+    r = rnd.random()
+    if r < 0.1:
+        w = w.capitalize()
+    elif r < 0.12:
+        w = w.upper()
+    return w
+
+
+def text(rnd, min_words=5, max_words=30):
+    pieces = []
+    for _ in range(rnd.randint(min_words, max_words)):
+        r = rnd.random()
+        if r < 0.04:
+            pieces.append(rnd.choice(MENTIONS))
+        elif r < 0.07:
+            pieces.append(rnd.choice(HASHTAGS))
+        elif r < 0.09:
+            pieces.append(rnd.choice(URLS))
+        elif r < 0.12:
+            pieces.append(rnd.choice(EMOJI))
+        elif r < 0.15:
+            pieces.append(rnd.choice(NUMBERS))
+        else:
+            w = word(rnd)
+            if rnd.random() < 0.15:
+                w += rnd.choice(PUNCT)
+            pieces.append(w)
+    return " ".join(pieces)
+
+
+def corpus(n_texts=1000, seed=1, min_words=5, max_words=30):
+    rnd = random.Random(seed)
+    return [text(rnd, min_words, max_words) for _ in range(n_texts)]
+
+
+def words(texts):
+    return [w for t in texts for w in t.split()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print a synthetic tweet-like corpus, one text per line")
+    parser.add_argument("--texts", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    for t in corpus(args.texts, args.seed):
+        print(t)
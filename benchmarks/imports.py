@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+
+#
+# Time it takes a fresh interpreter to import raposa modules,
+# and to stem a first word, over what it takes to do nothing
+#
+# Run from the root folder of the repository:
+#   python benchmarks/imports.py
+#
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+SNIPPETS = [
+    ("raposa.core.tokenizers", "import raposa.core.tokenizers"),
+    ("raposa.core.tubes", "import raposa.core.tubes"),
+    ("raposa.core.pipeline", "import raposa.core.pipeline"),
+    ("raposa.langs.gl.tubes", "import raposa.langs.gl.tubes"),
+    ("first stem", "from raposa.langs.gl.stemmer import GLSimpleStemmer; GLSimpleStemmer().stem('cantigas')"),
+]
+
+
+def run(code, repeat=7):
+    # best and median wall time of a fresh interpreter running code
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times)
+
+
+def measure(code, repeat=7):
+    # over an interpreter that does nothing
+    best, median = run(code, repeat)
+    empty, empty_median = run("pass", repeat)
+    return best - empty, median - empty_median
+
+
+if __name__ == "__main__":
+    print("%-28s %10s %10s" % ("import", "best (ms)", "median (ms)"))
+    for name, code in SNIPPETS:
+        best, median = measure(code)
+        print("%-28s %10.1f %10.1f" % (name, 1000 * best, 1000 * median))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+#
+# Bytes taken per Unit and per Context, against the classes
+# they replaced (dict-backed, with 'val' copied into the tags),
+# untagged and with the tags a few filters would set
+#
+# Run from the root folder of the repository:
+#   python benchmarks/memory.py
+#
+
+import os
+import sys
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, HERE)
+
+import corpus
+
+from raposa.core.advanced.elements import Context, Unit
+
+
+class LegacyUnit:
+
+    def __init__(self, ix, s, previous=None, next_=None):
+        self.ix = ix
+        self.as_is = s
+        self.tags = {}
+        self.tags["val"] = self.as_is
+        self.previous = previous
+        self.next = next_
+
+    def __setitem__(self, name, value):
+        self.tags[name] = value
+
+
+class LegacyContext:
+
+    def __init__(self, ix, s, previous=None, next_=None):
+        self.ix = ix
+        self.as_is = s.strip()
+        self.previous = previous.strip() if previous is not None else None
+        self.next = next_.strip() if next_ is not None else None
+
+
+SLUGS = ["number", "punctrem", "gl_estraviz"]
+
+
+def units(cls, words, tagged):
+    out = []
+    for i, w in enumerate(words):
+        u = cls(i, w, previous=words[i - 1] if i else None, next_=words[i + 1] if i + 1 < len(words) else None)
+        if tagged:
+            for slug in SLUGS:
+                # keys built as filters build them, a new string each time
+                u["t_" + slug + "_match"] = True
+        out.append(u)
+    return out
+
+
+def contexts(cls, texts):
+    return [cls(i, t, previous=texts[i - 1] if i else None, next_=texts[i + 1] if i + 1 < len(texts) else None)
+        for i, t in enumerate(texts)]
+
+
+def measure(build):
+    # bytes allocated by what build returns, words and texts aside
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objs = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(objs)
+
+
+if __name__ == "__main__":
+    texts = corpus.corpus(2000)
+    words = corpus.words(texts)
+    rows = [
+        ("unit", lambda cls: measure(lambda: units(cls, words, False)), LegacyUnit, Unit),
+        ("unit, 3 tags", lambda cls: measure(lambda: units(cls, words, True)), LegacyUnit, Unit),
+        ("context", lambda cls: measure(lambda: contexts(cls, texts)), LegacyContext, Context),
+    ]
+    print("%-16s %10s %10s %8s" % ("bytes per", "before", "after", "saved"))
+    for name, run, old, new in rows:
+        b, a = run(old), run(new)
+        print("%-16s %10.1f %10.1f %7.0f%%" % (name, b, a, 100 * (1 - a / b)))
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+#
+# Compares piping text through several RegexRemovals one after
+# the other against a single MultiRegexRemoval merging them
+# on tweet-length and document-length inputs, and on tweets with
+# emoji, which EmojiRemoval takes out after either of them
+#
+# Run from the root folder of the repository:
+#   python benchmarks/removal.py
+#
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from raposa.core.tubes import UrlRemoval, MentionRemoval, HashtagRemoval, RegexRemoval, NumberRemoval, MultiRegexRemoval, EmojiRemoval
+
+
+# one in ten words is something to remove
+WORDS = ["neoloxismo", "palabra", "que", "de", "casa", "tuíte", "o", "a", "en"] * 5 \
+    + ["ºª", "@usuaria", "#NeoloxismoDoAno", "https://t.co/a1b2c3", "2017"]
+EMOJI = ["😀", "👍🏽", "🇬🇱", "❤️", "👨‍👩‍👧"]
+
+
+def removals():
+    return [UrlRemoval(), MentionRemoval(), HashtagRemoval(), RegexRemoval(r'[ºª]+'), NumberRemoval()]
+
+
+def text(n_words, rnd, words=WORDS):
+    return " ".join(rnd.choice(words) for _ in range(n_words))
+
+
+def run(tubes, texts):
+    for t in texts:
+        units = [t]
+        for tube in tubes:
+            units = tube.pipe(units)
+        for u in units:
+            pass
+
+
+if __name__ == "__main__":
+    rnd = random.Random(1)
+    inputs = [
+        ("tweet", [text(20, rnd) for _ in range(2000)]),
+        ("document", [text(20000, rnd) for _ in range(2)]),
+        ("emoji", [text(20, rnd, WORDS + EMOJI) for _ in range(2000)]),
+    ]
+    for name, texts in inputs:
+        sequential = removals()
+        merged = [MultiRegexRemoval(removals())]
+        if name == "emoji":
+            sequential.append(EmojiRemoval())
+            merged.append(EmojiRemoval())
+        t_seq = min(timeit.repeat(lambda: run(sequential, texts), number=1, repeat=5))
+        t_merged = min(timeit.repeat(lambda: run(merged, texts), number=1, repeat=5))
+        print("%-10s sequential %8.2f ms   merged %8.2f ms   x%.2f" % (
+            name, t_seq * 1000, t_merged * 1000, t_seq / t_merged))
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+
+#
+# Times tokenizers, tubes, lexicon loading, the stemmer and whole
+# pipelines over a synthetic corpus (see corpus.py), and compares
+# the results against a stored baseline
+#
+# Run from the root folder of the repository:
+#   python benchmarks/suite.py                       compare against baseline.json
+#   python benchmarks/suite.py -k tubes/ -o out.json  only some, and keep results
+#   python benchmarks/suite.py --save-baseline        store these as the baseline
+#
+# Timings depend on the machine, so baselines are only worth comparing
+# against on the machine they were saved on; exits with 1 if anything
+# is slower than its baseline by more than its threshold
+#
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, HERE)
+
+import corpus
+import imports
+
+from raposa.core import lexicons, tokenizers, tubes
+from raposa.core.pipeline import BasicPipeline
+from raposa.langs.es.tubes import ESFirstNamesFilter, ESLastNamesFilter
+from raposa.langs.gl.stemmer import GLSimpleStemmer
+from raposa.langs.gl.tubes import GLEstravizFilter, GLToponymFilter, PATH_TO_ESTRAVIZ, _pth
+
+
+BASELINE = os.path.join(HERE, "baseline.json")
+# relative slowdown over the baseline that counts as a regression
+THRESHOLD = 0.25
+
+_benchmarks = []
+
+
+def benchmark(name):
+    # registers a function taking the corpus texts and returning
+    # what to time (called once per repeat) and how many units it runs
+    def register(f):
+        _benchmarks.append((name, f))
+        return f
+    return register
+
+
+def _pipe(tube, units):
+    return lambda: [u for u in tube.pipe(units)]
+
+
+#######################################
+# TOKENIZERS
+#######################################
+
+def _tokenizer(name, make):
+    @benchmark("tokenizers/" + name)
+    def bench(texts):
+        tokenizer = make()
+        return (lambda: [tokenizer.split(t) for t in texts]), len(texts)
+
+_tokenizer("basic", tokenizers.BasicTokenizer)
+_tokenizer("whitespace", tokenizers.WhitespaceTokenizer)
+_tokenizer("newline", tokenizers.NewlineTokenizer)
+_tokenizer("nltk_word", tokenizers.NltkWordTokenizer)
+_tokenizer("nltk_sent", tokenizers.NltkSentTokenizer)
+_tokenizer("regex", lambda: tokenizers.RegexTokenizer(r'[.,;:_\s\'\"]+'))
+
+
+def _spans(name, make):
+    @benchmark("tokenizers/" + name + "_spans")
+    def bench(texts):
+        tokenizer = make()
+        return (lambda: [list(tokenizer.spans(t)) for t in texts]), len(texts)
+
+_spans("whitespace", tokenizers.WhitespaceTokenizer)
+_spans("newline", tokenizers.NewlineTokenizer)
+_spans("regex", lambda: tokenizers.RegexTokenizer(r'[.,;:_\s\'\"]+'))
+
+
+#######################################
+# TUBES
+#######################################
+
+# adaptors and removals take strings, filters take {"val": ...} units
+# removals run on whole texts, like in demo.py, the rest on words
+
+def _tube(name, make, on):
+    @benchmark("tubes/" + name)
+    def bench(texts):
+        tube = make()
+        if on == "texts":
+            units = texts
+        elif on == "words":
+            units = corpus.words(texts)
+        else:
+            units = [{"val": w} for w in corpus.words(texts)]
+        return _pipe(tube, units), len(units)
+
+_tube("val_adaptor", tubes.ValAdaptor, "words")
+_tube("lowercase_adaptor", tubes.LowercaseAdaptor, "words")
+_tube("uppercase_adaptor", tubes.UppercaseAdaptor, "words")
+_tube("number_filter", tubes.NumberFilter, "vals")
+_tube("hashtag_filter", tubes.HashtagFilter, "vals")
+_tube("mention_filter", tubes.MentionFilter, "vals")
+_tube("url_filter", tubes.UrlFilter, "vals")
+_tube("emoji_filter", tubes.EmojiFilter, "vals")
+_tube("punct_filter", tubes.PunctFilter, "vals")
+_tube("regex_removal", lambda: tubes.RegexRemoval(r'[ºª]+'), "texts")
+_tube("number_removal", tubes.NumberRemoval, "texts")
+_tube("hashtag_removal", tubes.HashtagRemoval, "texts")
+_tube("mention_removal", tubes.MentionRemoval, "texts")
+_tube("url_removal", tubes.UrlRemoval, "texts")
+_tube("emoji_removal", tubes.EmojiRemoval, "texts")
+_tube("multi_regex_removal", lambda: tubes.MultiRegexRemoval([
+    tubes.UrlRemoval(), tubes.MentionRemoval(), tubes.HashtagRemoval()]), "texts")
+_tube("punct_removal", tubes.PunctRemoval, "words")
+_tube("dict_filter", lambda: GLEstravizFilter(), "words")
+_tube("dict_filter_unaccented", lambda: GLEstravizFilter(fold_accents=True), "words")
+_tube("multi_dict_filter", lambda: tubes.MultiDictFilter([
+    GLEstravizFilter(), GLToponymFilter(), ESFirstNamesFilter(), ESLastNamesFilter()]), "words")
+
+
+#######################################
+# LEXICONS
+#######################################
+
+@benchmark("lexicons/read_text")
+def bench_read_text(texts):
+    return (lambda: lexicons.read_lexicon(_pth(PATH_TO_ESTRAVIZ))), 1
+
+
+@benchmark("lexicons/compile")
+def bench_compile(texts):
+    dst = os.path.join(_tmp(), "compile.rlx")
+    return (lambda: lexicons.compile_lexicon(_pth(PATH_TO_ESTRAVIZ), dst)), 1
+
+
+@benchmark("lexicons/open_mapped")
+def bench_open_mapped(texts):
+    dst = os.path.join(_tmp(), "mapped.rlx")
+    lexicons.compile_lexicon(_pth(PATH_TO_ESTRAVIZ), dst)
+    return (lambda: lexicons.MappedLexicon(dst)), 1
+
+
+@benchmark("lexicons/dict_filter_first_lookup")
+def bench_dict_filter_load(texts):
+    # building the filter and looking up a word, which loads it
+    def run():
+        lexicons.evict()
+        list(GLEstravizFilter().pipe(["casa"]))
+    return run, 1
+
+
+_tmpdir = None
+
+
+def _tmp():
+    global _tmpdir
+    if _tmpdir is None:
+        _tmpdir = tempfile.mkdtemp(prefix="raposa-bench-")
+    return _tmpdir
+
+
+#######################################
+# STEMMER
+#######################################
+
+@benchmark("stemmer/stem")
+def bench_stem(texts):
+    stemmer = GLSimpleStemmer(cache_size=None)
+    words = sorted(set(w.lower() for w in corpus.words(texts) if w.isalpha()))
+    return (lambda: [stemmer.stem(w) for w in words]), len(words)
+
+
+@benchmark("stemmer/stem_cached")
+def bench_stem_cached(texts):
+    stemmer = GLSimpleStemmer(cache_size=10000)
+    words = [w.lower() for w in corpus.words(texts) if w.isalpha()]
+    return (lambda: [stemmer.stem(w) for w in words]), len(words)
+
+
+#######################################
+# PIPELINES
+#######################################
+
+def _shipped_pipeline(**kwargs):
+    # demo.py with the lexicons that ship with the repository
+    return BasicPipeline([
+        BasicPipeline([
+            tubes.LowercaseAdaptor(),
+            tubes.UrlRemoval(),
+            tubes.MentionRemoval(),
+            tubes.HashtagRemoval()
+        ]),
+        BasicPipeline(
+            tokenizer=tokenizers.RegexTokenizer(r'[.,;:_\s\'\"]+'),
+            tubes=[
+                tubes.RegexRemoval(r'[ºª]+'),
+                tubes.NumberRemoval(),
+                tubes.PunctRemoval(),
+                tubes.MultiDictFilter([
+                    GLEstravizFilter(), GLToponymFilter(), ESFirstNamesFilter(), ESLastNamesFilter()])
+            ]
+        )
+    ], reads_from_gen=False, **kwargs)
+
+
+def _pipeline(name, make):
+    @benchmark("pipelines/" + name)
+    def bench(texts):
+        pipe = make()
+        return (lambda: [w for t in texts for w in pipe.pipe(t)]), len(texts)
+
+_pipeline("shipped", _shipped_pipeline)
+_pipeline("shipped_compiled", lambda: _shipped_pipeline(compiled=True))
+_pipeline("shipped_cached", lambda: _shipped_pipeline(cache_size=10000))
+
+
+@benchmark("pipelines/shipped_columns")
+def bench_shipped_columns(texts):
+    pipe = _shipped_pipeline()
+    return (lambda: pipe.pipe_columns(texts).values()), len(texts)
+
+
+@benchmark("pipelines/demo")
+def bench_demo(texts):
+    # needs every lexicon in demo.py, some of which are not shipped
+    import demo
+    return (lambda: [w for t in texts for w in demo.pipe.pipe(t)]), len(texts)
+
+
+#######################################
+# IMPORTS
+#######################################
+
+def _import(name, code):
+    @benchmark("imports/" + name.replace(" ", "_"))
+    def bench(texts):
+        # a fresh interpreter each time, see imports.py
+        return (lambda: imports.run(code, repeat=1)), 1
+
+for name, code in imports.SNIPPETS:
+    _import(name, code)
+
+
+#######################################
+# RUNNING
+#######################################
+
+def run(names, texts, repeat):
+    results = {}
+    for name, make in _benchmarks:
+        if names and not any(n in name for n in names):
+            continue
+        try:
+            fn, units = make(texts)
+            fn()  # warm up, e.g. lazy lexicons
+            times = timeit.repeat(fn, number=1, repeat=repeat)
+        except Exception as e:
+            message = (str(e).strip().splitlines() or [""])[0]
+            results[name] = {"error": "%s: %s" % (type(e).__name__, message)}
+            continue
+        best = min(times)
+        results[name] = {
+            "seconds": best,
+            "median": statistics.median(times),
+            "units": units,
+            "us_per_unit": 1e6 * best / units
+        }
+    return results
+
+
+# runs are only comparable with the same corpus and number of runs
+COMPARABLE = ("texts", "seed", "repeat")
+
+
+def compare(results, baseline, threshold):
+    # adds the ratio to the baseline, per unit, and whether it is a regression
+    # thresholds may be set per benchmark in the baseline file
+    thresholds = baseline.get("thresholds", {})
+    base = baseline.get("results", {})
+    regressions = []
+    for name, r in results.items():
+        b = base.get(name)
+        if "us_per_unit" not in r or not b or "us_per_unit" not in b:
+            continue
+        r["ratio"] = r["us_per_unit"] / b["us_per_unit"]
+        if r["ratio"] > 1 + thresholds.get(name, threshold):
+            r["regression"] = True
+            regressions.append(name)
+    return regressions
+
+
+def format_results(results):
+    lines = ["%-40s %12s %10s %12s %8s" % ("benchmark", "best (ms)", "units", "us/unit", "ratio")]
+    for name, r in results.items():
+        if "error" in r:
+            lines.append("%-40s skipped, %s" % (name, r["error"]))
+            continue
+        ratio = "%.2f" % r["ratio"] if "ratio" in r else "-"
+        if r.get("regression"):
+            ratio += " !"
+        lines.append("%-40s %12.2f %10d %12.3f %8s" % (
+            name, 1000 * r["seconds"], r["units"], r["us_per_unit"], ratio))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument("-k", dest="names", action="append", help="only benchmarks with this in their name")
+    parser.add_argument("--texts", type=int, default=2000, help="texts in the corpus")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the corpus")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark, the best one counts")
+    parser.add_argument("-o", "--output", help="write results as JSON here")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline to compare against")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="relative slowdown that counts as a regression")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    args = parser.parse_args()
+
+    texts = corpus.corpus(args.texts, args.seed)
+    try:
+        results = run(args.names, texts, args.repeat)
+    finally:
+        if _tmpdir is not None:
+            shutil.rmtree(_tmpdir, ignore_errors=True)
+
+    meta = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "date": time.strftime("%Y-%m-%d"),
+        "texts": args.texts,
+        "seed": args.seed,
+        "repeat": args.repeat
+    }
+    regressions = []
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        differs = [k for k in COMPARABLE if baseline.get("meta", {}).get(k) != meta[k]]
+        if differs:
+            print("not compared against the baseline, which was run with other %s" % ", ".join(
+                "%s (%s)" % (k, baseline.get("meta", {}).get(k)) for k in differs), file=sys.stderr)
+        else:
+            regressions = compare(results, baseline, args.threshold)
+    print(format_results(results))
+
+    report = {
+        "meta": meta,
+        "results": results
+    }
+    if args.output:
+        with open(args.output, mode="w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if args.save_baseline:
+        thresholds = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                thresholds = json.load(f).get("thresholds", {})
+        report["thresholds"] = thresholds
+        report["results"] = {n: r for n, r in results.items() if "seconds" in r}
+        with open(args.baseline, mode="w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if regressions:
+        print("%d regression(s): %s" % (len(regressions), ", ".join(regressions)), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
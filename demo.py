@@ -9,7 +9,7 @@
 
 from raposa.core.pipeline import BasicPipeline
 from raposa.core.tokenizers import RegexTokenizer
-from raposa.core.tubes import LowercaseAdaptor, UrlRemoval, MentionRemoval, HashtagRemoval, EmojiRemoval, RegexRemoval, PunctRemoval, NumberRemoval 
+from raposa.core.tubes import LowercaseAdaptor, UrlRemoval, MentionRemoval, HashtagRemoval, EmojiRemoval, RegexRemoval, PunctRemoval, NumberRemoval, MultiDictFilter
 from raposa.langs.gl.tubes import GLXiadaFilter, GLEstravizFilter, GLToponymFilter, GLWikipediaFilter
 from raposa.langs.es.tubes import ESFirstNamesFilter, ESLastNamesFilter
 
@@ -22,7 +22,7 @@ pipe = BasicPipeline([
 		MentionRemoval(),
 		HashtagRemoval(),
 		EmojiRemoval()
-	]),
+	], slug="preprocessing"),
 	# word massaging & filtering
 	BasicPipeline(
 		tokenizer=RegexTokenizer(r'[.,;:_\s\'\"]+'),
@@ -30,18 +30,23 @@ pipe = BasicPipeline([
 			RegexRemoval(r'[ºª]+'),
 			NumberRemoval(),
 			PunctRemoval(),
-			GLXiadaFilter(),
-			GLEstravizFilter(),
-			GLToponymFilter(),
-			GLWikipediaFilter(),
-			ESFirstNamesFilter(),
-			ESLastNamesFilter()
-		]
+			# looked up all at once, but applied in this order
+			MultiDictFilter([
+				GLXiadaFilter(),
+				GLEstravizFilter(),
+				GLToponymFilter(),
+				GLWikipediaFilter(),
+				ESFirstNamesFilter(),
+				ESLastNamesFilter()
+			])
+		],
+		slug="filtering"
 	)
 ], reads_from_gen=False)
 
-with open("input.txt") as in_file, \
-	 open("output.txt", mode='w') as out_file:
-	for line in in_file:
-		for word in pipe.pipe(line):
-			out_file.write(word + "\n")
+if __name__ == "__main__":
+	with open("input.txt") as in_file, \
+		 open("output.txt", mode='w') as out_file:
+		for line in in_file:
+			for word in pipe.pipe(line):
+				out_file.write(word + "\n")
@@ -0,0 +1,150 @@
+import argparse
+import importlib
+import io
+import os
+import sys
+import time
+
+#
+# Runs a pipeline over large corpora, one text per line,
+# writing one resulting token per line
+#
+#   raposa mypackage.mymodule:pipe corpus.txt -o output.txt --workers 4
+#
+
+
+BUFFER_SIZE = 1 << 20
+
+
+def load_pipeline(path):
+    # "package.module:name" or "package.module.name"
+    # if name is a function or class, it's called to build the pipeline
+    if ":" in path:
+        module, _, name = path.partition(":")
+    else:
+        module, _, name = path.rpartition(".")
+    if not module or not name:
+        raise ValueError("Pipeline must be given as module:name")
+    obj = getattr(importlib.import_module(module), name)
+    if not hasattr(obj, "pipe") or isinstance(obj, type):
+        obj = obj()
+    return obj
+
+
+def read_lines(paths, stats):
+    for path in paths or ["-"]:
+        if path == "-":
+            f = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8")
+        else:
+            f = open(path, encoding="utf-8", buffering=BUFFER_SIZE)
+        with f:
+            for line in f:
+                stats.lines += 1
+                yield line
+
+
+def run(pipeline, lines, workers=None, chunk_size=1000):
+    if workers:
+        from .core.parallel import ParallelPipeline
+        return ParallelPipeline(pipeline, workers=workers, chunk_size=chunk_size).pipe(lines)
+    if getattr(pipeline, "_reads_from_gen", True):
+        return pipeline.pipe(lines)
+    return (t for line in lines for t in pipeline.pipe(line))
+
+
+class Stats:
+
+    def __init__(self, pipeline=None):
+        self.lines = 0
+        self.tokens = 0
+        self.start = time.perf_counter()
+        # if profiled, to tell how much of what goes into it is discarded
+        self.pipeline = pipeline
+
+    def report(self, final=False):
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        return "%s%d lines (%.0f/s), %d tokens out (%.0f/s)%s, %.1fs" % (
+            "done: " if final else "",
+            self.lines, self.lines / elapsed,
+            self.tokens, self.tokens / elapsed,
+            self.discarded(), elapsed)
+
+    def discarded(self):
+        # units discarded by any tube against those that made it out,
+        # from the profiling counters, so a text discarded before
+        # being split into tokens counts once
+        if self.pipeline is None:
+            return ""
+        head = self.pipeline.profile_report(sort=None)[0]
+        total = head["discarded"] + head["units_out"]
+        return ", %.1f%% of units discarded" % (100 * head["discarded"] / total if total else 0.0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="raposa",
+        description="Run a pipeline over texts, one per line, writing a token per line")
+    parser.add_argument("pipeline", help="pipeline to run, as module:name (called if not a pipeline)")
+    parser.add_argument("inputs", nargs="*", help="input files (default or '-': stdin)")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="lines sent to a worker at a time")
+    parser.add_argument("--batch-size", type=int, default=10000, help="tokens written at a time")
+    parser.add_argument("--compile", action="store_true", help="compile the pipeline before running it")
+    parser.add_argument("--cache-size", type=int, default=None, help="cache outcomes of pure tubes for this many tokens")
+    parser.add_argument("--progress", type=float, default=None, metavar="SECONDS", help="report progress to stderr every so often")
+    parser.add_argument("--report", action="store_true", help="report throughput to stderr when done")
+    parser.add_argument("--profile", action="store_true", help="report what each tube discards and takes to stderr when done")
+    args = parser.parse_args(argv)
+    # counters only see what runs in this process and is not replayed from a cache
+    if args.profile and (args.workers or args.cache_size):
+        parser.error("--profile cannot be used with --workers or --cache-size")
+
+    sys.path.insert(0, "")
+    pipeline = load_pipeline(args.pipeline)
+    if args.compile or args.cache_size:
+        pipeline.compile(cache_size=args.cache_size)
+    if args.profile:
+        if not hasattr(pipeline, "profile"):
+            parser.error("--profile needs a pipeline that can be profiled")
+        pipeline.profile()
+
+    stats = Stats(pipeline if args.profile else None)
+    if args.output == "-":
+        out = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", write_through=False)
+    else:
+        out = open(args.output, mode="w", encoding="utf-8", buffering=BUFFER_SIZE)
+
+    last = stats.start
+    batch = []
+    try:
+        try:
+            for token in run(pipeline, read_lines(args.inputs, stats), args.workers, args.chunk_size):
+                batch.append(str(token))
+                if len(batch) >= args.batch_size:
+                    stats.tokens += len(batch)
+                    out.write("\n".join(batch) + "\n")
+                    batch = []
+                    if args.progress is not None and time.perf_counter() - last >= args.progress:
+                        last = time.perf_counter()
+                        print(stats.report(), file=sys.stderr)
+            if batch:
+                stats.tokens += len(batch)
+                out.write("\n".join(batch) + "\n")
+        finally:
+            out.flush()
+            if args.output != "-":
+                out.close()
+    except BrokenPipeError:
+        # whoever reads stdout stopped doing so, e.g. head: leave quietly,
+        # with stdout pointing nowhere, as it is flushed again on exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+
+    if args.report or args.progress is not None or args.profile:
+        print(stats.report(final=True), file=sys.stderr)
+    if args.profile:
+        pipeline.profile_report(file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,68 @@
+import gzip
 import json
+import re
+import sys
+from types import MappingProxyType
 
 class Unit:
 
-    def __init__(self, ix, s, previous=None, next_=None):
+    # slotted, as there is one per token in the corpus
+    # tags other than 'val' are only given a dict once one is set,
+    # and their keys are interned, as every unit has the same ones
+    __slots__ = ("ix", "as_is", "previous", "next", "start", "end", "_val", "_tags")
+
+    def __init__(self, ix, s, previous=None, next_=None, start=None, end=None):
         self.ix = ix
         self.as_is = s # unmutable copy of token as it's in text
-        self.tags = {}
+        # where it is in its context, if the tokenizer can tell
+        self.start = start
+        self.end = end
         # 'val' is a universal tag updatable by filters
         # it is the one that should be checked by filters by default
         # some filters may transform it (e.g. orthography changes)
-        self.tags["val"] = self.as_is
+        self._val = s
+        self._tags = None
         self.previous = previous
         self.next = next_
 
 
+    @property
+    def tags(self):
+        # read-only, with 'val' first; set them through unit[name]
+        # (or all at once, assigning a new dict to unit.tags)
+        tags = {"val": self._val}
+        if self._tags:
+            tags.update(self._tags)
+        return MappingProxyType(tags)
+
+
+    @tags.setter
+    def tags(self, tags):
+        tags = dict(tags)
+        self._val = tags.pop("val", self.as_is)
+        self._tags = None
+        for name, value in tags.items():
+            self[name] = value
+
+
     def __str__(self):
         return self["val"]
 
 
     def __getitem__(self, name):
-        return self.tags[name] if name in self.tags else None
+        if name == "val":
+            return self._val
+        tags = self._tags
+        return tags.get(name) if tags else None
 
 
     def __setitem__(self, name, value):
-        self.tags[name] = value
+        if name == "val":
+            self._val = value
+            return
+        if self._tags is None:
+            self._tags = {}
+        self._tags[sys.intern(name)] = value
 
 
     def __repr__(self):
@@ -32,19 +71,17 @@ class Unit:
             self.ix,
             self.as_is,
             self.next,
-            self.tags
+            dict(self.tags)
         )
 
 
     def __eq__(self, other):
-        if self.as_is != other.as_is \
-          or self.ix != other.ix:
-            return False
-        for my_tag, my_tag in self.tags.items():
-            if my_tag not in other.tags \
-              and my_val != other.tags[my_tag]:
-                return False
-        return True
+        if not isinstance(other, Unit):
+            return NotImplemented
+        return self.as_is == other.as_is \
+          and self.ix == other.ix \
+          and self._val == other._val \
+          and (self._tags or {}) == (other._tags or {})
 
 
     def __ne__(self, other):
@@ -52,11 +89,8 @@ class Unit:
 
 
     def __hash__(self):
-        # arbitrary hash definition
-        return str(self.ix) \
-          + self.as_is \
-          + "&".join(self.tags.keys()) \
-          + "%".join(self.tags.values())
+        # arbitrary hash definition, on what filters never change
+        return hash((self.ix, self.as_is))
 
 
     def __lt__(self, other):
@@ -69,6 +103,8 @@ class Unit:
 
 class Context:
 
+    __slots__ = ("ix", "as_is", "previous", "next")
+
     def __init__(self, ix, s, previous=None, next_=None):
         self.ix = ix
         # contexts are not touched by filters
@@ -92,6 +128,8 @@ class Context:
 
 
     def __eq__(self, other):
+        if not isinstance(other, Context):
+            return NotImplemented
         return self.as_is == other.as_is \
            and self.ix == other.ix \
            and self.previous == other.previous \
@@ -104,7 +142,7 @@ class Context:
 
     def __hash__(self):
         # arbitrary hash definition
-        return "%s&%s&%s&%s" % (self.ix, self.as_is, self.previous, self.next)
+        return hash((self.ix, self.as_is, self.previous, self.next))
 
 
     def __lt__(self, other):
@@ -133,23 +171,78 @@ class Result:
             self.context.next
         )
 
+    def to_dict(self):
+        unit = dict(
+            index = self.unit.ix,
+            as_is = self.unit.as_is,
+            previous = self.unit.previous,
+            next = self.unit.next)
+        if self.unit.start is not None:
+            unit["start"] = self.unit.start
+            unit["end"] = self.unit.end
+        unit.update(self.unit.tags)
+        return {
+            "unit": unit,
+            "context": {
+                "index": self.context.ix,
+                "as_is": self.context.as_is,
+                "previous": self.context.previous,
+                "next": self.context.next
+            }
+        }
+
+    @staticmethod
+    def from_dict(d):
+        tags = dict(d["unit"])
+        unit = Unit(tags.pop("index"), tags.pop("as_is"),
+            previous=tags.pop("previous"), next_=tags.pop("next"),
+            start=tags.pop("start", None), end=tags.pop("end", None))
+        unit.tags = tags
+        c = d["context"]
+        context = Context(c["index"], c["as_is"], previous=c["previous"], next_=c["next"])
+        return Result(unit, context)
+
     @staticmethod
     def dump(results, path):
-        js = [
-            {
-                "unit": dict(
-                    index = result.unit.ix,
-                    as_is = result.unit.as_is,
-                    previous = result.unit.previous,
-                    next = result.unit.next,
-                    **result.unit.tags.copy()),
-                "context": {
-                    "index": result.context.ix,
-                    "as_is": result.context.as_is,
-                    "previous": result.context.previous,
-                    "next": result.context.next
-                }
-            } for result in results
-        ]
-        with open(path, mode='w', encoding='utf-8') as f:
-            f.write(json.dumps(js, indent=4, ensure_ascii=False, default=str))
+        # one JSON array, written as results come
+        # (see dump_lines for something that can be read back the same way)
+        encode = json.JSONEncoder(indent=4, ensure_ascii=False, default=str).encode
+        with open(path, mode='w', encoding='utf-8', buffering=_BUFFER_SIZE) as f:
+            sep = "[\n"
+            for result in results:
+                f.write(sep)
+                f.write(_INDENT.sub("    ", encode(result.to_dict())))
+                sep = ",\n"
+            f.write("[]" if sep == "[\n" else "\n]")
+
+    @staticmethod
+    def dump_lines(results, path, compress=None):
+        # JSON Lines, a result per line, written as results come
+        # gzip-compressed if compress, or by default if path ends in .gz
+        encode = json.JSONEncoder(ensure_ascii=False, default=str).encode
+        with _open(path, 'w', compress) as f:
+            for result in results:
+                f.write(encode(result.to_dict()))
+                f.write("\n")
+
+    @staticmethod
+    def load_lines(path, compress=None):
+        # reads back what dump_lines wrote, a result at a time
+        with _open(path, 'r', compress) as f:
+            for line in f:
+                if line.strip():
+                    yield Result.from_dict(json.loads(line))
+
+
+_BUFFER_SIZE = 1 << 20
+
+# start of every line, to indent items of a JSON array
+_INDENT = re.compile(r'^', re.MULTILINE)
+
+
+def _open(path, mode, compress=None):
+    if compress is None:
+        compress = str(path).endswith(".gz")
+    if compress:
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode=mode, encoding='utf-8', buffering=_BUFFER_SIZE)
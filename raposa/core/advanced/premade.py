@@ -1,52 +1,161 @@
-from ..tokenizers import WhitespaceTokenizer, NewlineTokenizer, NltkWordTokenizer, NltkSentTokenizer
+from ..pipeline import BasicPipeline, _profiles_itself, _profiled_pipe
+from ..tokenizers import NltkWordTokenizer, NltkSentTokenizer
 from .elements import Context, Unit, Result
 
 #
-# OUTDATED
+# Pipeline that keeps track of where each token comes from:
+# texts are split into contexts (sentences by default), contexts
+# into units, and what comes out are Results of unit and context,
+# each knowing the ones before and after it
+#
+# texts are read in pieces and contexts are made one at a time,
+# so memory does not grow with the size of the text
 #
-# Theis class does not work after the last refactor
-# Its usefulness probably remains, but it needs a refactor
-# 
 
 
 class AdvancedPipeline(BasicPipeline):
 
-    def __init__(self, filters, unit_tokenizer=NltkWordTokenizer(), ctxt_tokenizer=NltkSentTokenizer(), **kwargs):
-        super().__init__(filters, unit_tokenizer=unit_tokenizer, ctxt_tokenizer=ctxt_tokenizer, **kwargs)
+    def __init__(self, tubes=[], unit_tokenizer=NltkWordTokenizer(), ctxt_tokenizer=NltkSentTokenizer(),
+                 across_texts=False, piece_size=1 << 16, **kwargs):
+        # with across_texts, texts are pieces of the same stream
+        # (e.g. lines of a file) so contexts may span them, with a
+        # line break in between where neither side has whitespace
+        # otherwise, as in BasicPipeline, each text stands on its own
+        super().__init__(tubes, tokenizer=unit_tokenizer, **kwargs)
+        self.ctxt_tokenizer = ctxt_tokenizer
+        self._across_texts = across_texts
+        self._piece_size = piece_size
+
+    def pipe(self, g, workers=None, chunk_size=1000):
+        # with workers, texts never share contexts
+        if workers is not None or not self._across_texts:
+            yield from super().pipe(g, workers=workers, chunk_size=chunk_size)
+            return
+        for context in self._into_contexts(g if self._reads_from_gen else [g]):
+            yield from self._pipe_context(context)
+
+    def _pipe_text(self, text):
+        for context in self._into_contexts([text]):
+            yield from self._pipe_context(context)
+
+    def _pipe_context(self, context):
+        for unit in self._into_units(context):
+            for u in self._process(unit):
+                yield self._pack(u, context)
 
-    def _into_contexts(self, text):
-        tokens = self.ctxt_tokenizer.split(text)
-        for i, (p, c, n) in enumerate(cls._take_in_threes(tokens)):
+    def _process(self, unit):
+        # tubes may hand back the value alone, which is put back in
+        # the unit right away, so the tubes after get a unit to tag
+        if self._plan is not None:
+            return super()._process(unit)
+        units = [unit]
+        for t in self.tubes:
+            if self._stats is not None and not _profiles_itself(t):
+                units = _profiled_pipe(t, units)
+            else:
+                units = t.pipe(units)
+            units = _rewrapped(units, unit)
+        return units
+
+    def compile(self, cache_size=None):
+        super().compile(cache_size)
+        # same as in _process, after each step
+        self._plan = [(process and _rewrapping(process), fan_out and _rewrapping_all(fan_out), *rest)
+                      for process, fan_out, *rest in self._plan]
+        return self
+
+    def _into_contexts(self, texts):
+        contexts = self._take_in_threes(self._split_contexts(texts))
+        for i, (p, c, n) in enumerate(contexts):
             yield Context(i, c, previous=p, next_=n)
 
     def _into_units(self, context):
-        tokens = self.unit_tokenizer.split(context.as_is)
-        for i, (p, c, n) in enumerate(cls._take_in_threes(tokens)):
-            yield Unit(i, c, previous=p, next_=n)
+        # with offsets in the context, unless the tokenizer
+        # gives tokens that are not as they are in the text
+        text = context.as_is
+        try:
+            tokens = [(text[s:e], s, e) for s, e in self.tokenizer.spans(text)]
+        except (AttributeError, ValueError):
+            tokens = [(t, None, None) for t in self._into_tokens(text)]
+        for i, (p, c, n) in enumerate(self._take_in_threes(tokens)):
+            yield Unit(i, c[0], previous=p and p[0], next_=n and n[0], start=c[1], end=c[2])
 
-    def _pack(cls, word, context):
-        return Result(word, context)
+    def _pack(self, unit, context):
+        return Result(unit, context)
 
-    @classmethod
-    def _take_in_threes(lst):
-        if len(lst) == 0:
-            return
+    def _split_contexts(self, texts):
+        # the last context found in what has been read so far
+        # may go on in what comes next, so it is held back
+        rest = ""
+        # while it has no end, it is split again only once it has
+        # doubled, or a long context would be split once per piece
+        due = 0
+        for text in texts:
+            if rest and text and not rest[-1].isspace() and not text[0].isspace():
+                rest += "\n"
+            for piece in self._pieces(text):
+                rest += piece
+                if len(rest) < due:
+                    continue
+                ctxts = self.ctxt_tokenizer.split(rest)
+                if len(ctxts) < 2:
+                    due = 2 * len(rest)
+                    continue
+                yield from (c for c in ctxts[:-1] if c.strip())
+                start = rest.rfind(ctxts[-1])
+                rest = rest[start:] if start >= 0 else ctxts[-1] + " "
+                due = 0
+        if rest.strip():
+            yield from (c for c in self.ctxt_tokenizer.split(rest) if c.strip())
 
-        previous = None
-        curr = lst[0]
-        next_ = None
-
-        if len(lst) == 1:
-            yield previous, curr, next_
+    def _pieces(self, text):
+        # slices of about piece_size, cut after whitespace
+        # so that no token is cut in half
+        start = 0
+        while len(text) - start > self._piece_size:
+            end = start + self._piece_size
+            while end < len(text) and not text[end - 1].isspace():
+                end += 1
+            yield text[start:end]
+            start = end
+        yield text[start:]
 
+    @staticmethod
+    def _take_in_threes(tokens):
+        # (previous, current, next) for each token, looking
+        # just one ahead, so it works on generators too
+        previous = None
+        it = iter(tokens)
+        for curr in it:
+            break
         else:
-            for currtoken in lst[1:]:
-                # we yield for the token before the current
-                next_ = currtoken
-                yield previous, curr, next_
-                previous = curr
-                curr = next_
-
-            # last yield, with last element of list as current
-            next_ = None
+            return
+        for next_ in it:
+            # we yield for the token before the current
             yield previous, curr, next_
+            previous = curr
+            curr = next_
+        # last yield, with last element as current
+        yield previous, curr, None
+
+
+def _rewrapped(units, unit):
+    for u in units:
+        if type(u) == str:
+            unit["val"] = u
+            u = unit
+        yield u
+
+
+def _rewrapping(process):
+    def step(unit):
+        new_unit = process(unit)
+        if new_unit and type(new_unit) == str:
+            unit["val"] = new_unit
+            return unit
+        return new_unit
+    return step
+
+
+def _rewrapping_all(fan_out):
+    return lambda unit: _rewrapped(fan_out(unit), unit)
@@ -0,0 +1,96 @@
+import asyncio
+import concurrent.futures
+import functools
+
+from . import parallel
+
+
+# marks the end of the texts, and of the batches
+_END = object()
+
+
+def _run(pipeline, batch):
+    return [t for text in batch for t in pipeline._pipe_text(text)]
+
+
+async def _aiter(texts):
+    if hasattr(texts, "__aiter__"):
+        async for text in texts:
+            yield text
+    else:
+        for text in texts:
+            yield text
+
+
+async def _read(texts, queue):
+    try:
+        async for text in _aiter(texts):
+            await queue.put(text)
+    finally:
+        await queue.put(_END)
+
+
+async def _batch(queue, batches, size, latency, submit):
+    # a batch is sent out once it is full, or once its first text
+    # has been waiting for latency seconds, whatever comes first
+    loop = asyncio.get_event_loop()
+    text = None
+    while text is not _END:
+        text = await queue.get()
+        if text is _END:
+            break
+        batch = [text]
+        deadline = loop.time() + latency
+        while len(batch) < size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                text = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if text is _END:
+                break
+            batch.append(text)
+        await batches.put(submit(batch))
+    await batches.put(_END)
+
+
+async def apipe(pipeline, texts, batch_size=100, latency=0.05, executor=None, workers=None, backlog=2):
+    # texts is an async iterable (or a plain one) of texts, and tokens
+    # come out of an async generator, in the same order
+    # tubes run off the event loop, in executor (the loop's default
+    # thread pool if None) or in that many worker processes
+    # at most backlog batches are waiting to be yielded, and texts
+    # are only read from the stream when there is room for them
+    loop = asyncio.get_event_loop()
+    own = None
+    if workers is not None:
+        # same as ParallelPipeline, with fork workers inherit lazy data
+        if hasattr(pipeline, "preload"):
+            pipeline.preload()
+        own = executor = concurrent.futures.ProcessPoolExecutor(workers,
+            initializer=parallel._init_worker, initargs=(pipeline,))
+        work = parallel._work
+    else:
+        work = functools.partial(_run, pipeline)
+
+    queue = asyncio.Queue(batch_size)
+    batches = asyncio.Queue(backlog)
+    reader = loop.create_task(_read(texts, queue))
+    batcher = loop.create_task(_batch(queue, batches, batch_size, latency,
+        lambda batch: loop.run_in_executor(executor, work, batch)))
+    try:
+        while True:
+            future = await batches.get()
+            if future is _END:
+                break
+            for t in await future:
+                yield t
+        # raises whatever stopped the stream early
+        await reader
+    finally:
+        reader.cancel()
+        batcher.cancel()
+        if own is not None:
+            own.shutdown(wait=False)
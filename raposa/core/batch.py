@@ -0,0 +1,114 @@
+#
+# Columnar batches of tokens: one list of values, one list per tag
+# and a mask of which tokens are still alive, so tubes can run over
+# whole columns instead of over str or dict units one at a time
+# (see BasicTube.pipe_columns and BasicPipeline.pipe_columns)
+#
+# tubes see values as they would see str units, whatever the shape
+# of the units the batch was made from, and tags go to their columns
+# so a dict unit keeps being a dict unit, and a str unit
+# comes back out as a dict unit only once it has been tagged
+#
+
+
+# cells of tags that were never set on that token
+_UNSET = object()
+
+
+class TokenBatch:
+
+    def __init__(self, vals, keep=None, dicts=None):
+        self.vals = list(vals)
+        self.keep = [True] * len(self.vals) if keep is None else list(keep)
+        # whether each token goes back out as a dict unit
+        self.dicts = [False] * len(self.vals) if dicts is None else list(dicts)
+        # tag name to column, only created once the tag is set
+        self.tags = {}
+
+    @classmethod
+    def from_units(cls, units, keep=None):
+        units = list(units)
+        vals = []
+        dicts = []
+        tags = {}
+        for i, u in enumerate(units):
+            if type(u) == str:
+                vals.append(u)
+                dicts.append(False)
+                continue
+            vals.append(u["val"])
+            dicts.append(True)
+            for name, value in u.items():
+                if name != "val":
+                    if name not in tags:
+                        tags[name] = [_UNSET] * len(units)
+                    tags[name][i] = value
+        batch = cls(vals, keep, dicts)
+        batch.tags = tags
+        return batch
+
+    def to_units(self, alive_only=False):
+        # str units where untagged and made from str, dicts otherwise
+        units = []
+        columns = list(self.tags.items())
+        for i, v in enumerate(self.vals):
+            if alive_only and not self.keep[i]:
+                continue
+            tagged = [(name, c[i]) for name, c in columns if c[i] is not _UNSET]
+            if self.dicts[i] or tagged:
+                unit = {"val": v}
+                unit.update(tagged)
+                units.append(unit)
+            else:
+                units.append(v)
+        return units
+
+    def alive(self):
+        return [i for i, k in enumerate(self.keep) if k]
+
+    def values(self):
+        return [v for v, k in zip(self.vals, self.keep) if k]
+
+    def column(self, name):
+        c = self.tags.get(name)
+        if c is None:
+            c = self.tags[name] = [_UNSET] * len(self.vals)
+        return c
+
+    def get(self, name, i, default=None):
+        c = self.tags.get(name)
+        if c is None or c[i] is _UNSET:
+            return default
+        return c[i]
+
+    def unwrap(self, i):
+        # goes back out as a str unit, its tags lost, as it would be
+        # had a tube handed back its value alone
+        self.dicts[i] = False
+        for c in self.tags.values():
+            c[i] = _UNSET
+
+    def compact(self):
+        # drops the tokens that are no longer alive
+        ixs = self.alive()
+        batch = TokenBatch([self.vals[i] for i in ixs], dicts=[self.dicts[i] for i in ixs])
+        batch.tags = {name: [c[i] for i in ixs] for name, c in self.tags.items()}
+        return batch
+
+    def split(self, split):
+        # tokenizes every token still alive into new ones, as
+        # tokenizers take str, tags and shapes do not make it through
+        return TokenBatch([t for v, k in zip(self.vals, self.keep) if k for t in split(v)])
+
+    def through(self, tube):
+        # runs a tube that cannot work on columns over units instead
+        units = self.to_units()
+        if hasattr(tube, "pipe_batch"):
+            units, keep = tube.pipe_batch(units, self.keep)
+        else:
+            units = [o for u, k in zip(units, self.keep) if k for o in tube.pipe([u])]
+            keep = None
+        return TokenBatch.from_units(units, keep)
+
+    def __len__(self):
+        return len(self.vals)
@@ -0,0 +1,93 @@
+import json
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+
+    # bounded mapping that drops the least recently used entries first
+    # (unbounded if maxsize is None) and counts hits, misses and
+    # evictions, to tell whether it is worth its memory
+    # keys and values must be JSON-serializable to save/load it
+    # (tuples come back as lists, but as tuples where in keys)
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if self.maxsize is not None:
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def reset_stats(self):
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def save(self, path):
+        # least recently used first, so loading keeps the order
+        with self._lock:
+            entries = list(self._data.items())
+        with open(path, mode='w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False)
+
+    def load(self, path):
+        with open(path, encoding='utf-8') as f:
+            entries = json.load(f)
+        for key, value in entries:
+            self.put(_hashable(key), value)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+
+def _hashable(key):
+    # JSON turns tuples into lists, which cannot be keys
+    if type(key) == list:
+        return tuple(_hashable(k) for k in key)
+    return key
@@ -0,0 +1,119 @@
+import re
+import threading
+
+#
+# Emoji lookup built once from the data in the emoji package:
+# a character class of every codepoint an emoji may start with,
+# so text is scanned for candidates at regex speed, and a trie
+# of codepoints to take the longest emoji found at each of them
+#
+# pure ASCII text is never scanned, as no emoji is made of ASCII only
+#
+
+
+class EmojiIndex:
+
+    def __init__(self, emojis):
+        emojis = [e for e in emojis if e]
+        self._trie = {}
+        for e in emojis:
+            node = self._trie
+            for c in e:
+                node = node.setdefault(c, {})
+            # None can never be a character, so it marks the ends
+            node[None] = True
+        self._start = re.compile(_char_class(self._trie))
+        self._ascii = any(e.isascii() for e in emojis)
+
+    def match(self, text, pos=0):
+        # end of the longest emoji starting at pos, or -1
+        node = self._trie
+        end = -1
+        for i in range(pos, len(text)):
+            node = node.get(text[i])
+            if node is None:
+                break
+            if None in node:
+                end = i + 1
+        return end
+
+    def spans(self, text):
+        # (start, end) of each emoji, leftmost and longest first
+        if not self._ascii and text.isascii():
+            return
+        search = self._start.search
+        pos = 0
+        while True:
+            m = search(text, pos)
+            if m is None:
+                return
+            start = m.start()
+            end = self.match(text, start)
+            if end > start:
+                yield start, end
+                pos = end
+            else:
+                pos = start + 1
+
+    def remove(self, text):
+        pieces = []
+        last = 0
+        for start, end in self.spans(text):
+            pieces.append(text[last:start])
+            last = end
+        if last == 0:
+            return text
+        pieces.append(text[last:])
+        return "".join(pieces)
+
+    def only(self, text):
+        # whether text is made up of emoji and nothing else
+        if not self._ascii and text.isascii():
+            return text == ""
+        pos = 0
+        while pos < len(text):
+            pos = self.match(text, pos)
+            if pos < 0:
+                return False
+        return True
+
+
+def _char_class(trie):
+    # first codepoints, as ranges where they are consecutive
+    codes = sorted(ord(c) for c in trie if c is not None)
+    parts = []
+    i = 0
+    while i < len(codes):
+        j = i
+        while j + 1 < len(codes) and codes[j + 1] == codes[j] + 1:
+            j += 1
+        first, last = re.escape(chr(codes[i])), re.escape(chr(codes[j]))
+        parts.append(first if i == j else first + "-" + last)
+        i = j + 1
+    return "[" + "".join(parts) + "]"
+
+
+def emoji_data():
+    # every emoji known to the installed emoji package
+    # EMOJI_DATA since 2.0, UNICODE_EMOJI before (per language since 1.0)
+    import emoji
+    data = getattr(emoji, "EMOJI_DATA", None)
+    if data is None:
+        data = emoji.UNICODE_EMOJI
+        if "en" in data:
+            data = data["en"]
+    return list(data)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    # built on first use, and shared by every tube
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = EmojiIndex(emoji_data())
+    return _index
@@ -0,0 +1,388 @@
+import mmap
+import os
+import struct
+import sys
+import threading
+import weakref
+import zlib
+from array import array
+
+
+class LexiconError(Exception):
+    pass
+
+
+#######################################
+# NORMALIZATION
+#######################################
+
+# words are stored and looked up by a key, lowercased with ignore_case
+# and without accents or other combining marks with fold_accents
+
+_normalizers = {}
+_normalizers_lock = threading.Lock()
+
+
+def normalizer(ignore_case=True, fold_accents=False):
+    # the function giving the key of a word in that mode, None if the
+    # key is the word itself, shared by everything using the same mode
+    mode = (bool(ignore_case), bool(fold_accents))
+    key = _normalizers.get(mode)
+    if key is None and mode != (False, False):
+        with _normalizers_lock:
+            key = _normalizers.get(mode)
+            if key is None:
+                key = _normalizers[mode] = _normalizer(*mode)
+    return key
+
+
+def _normalizer(ignore_case, fold_accents):
+    fold = _folding(ignore_case, fold_accents)
+    if not fold_accents:
+        # cheaper to lowercase again than to look it up anywhere
+        return fold
+    # folding is not, so recent keys are kept: filters looking up
+    # the same unit one after the other compute it once, and so do
+    # the words that come up again and again in any text
+    from functools import lru_cache
+    return lru_cache(maxsize=1 << 16)(fold)
+
+
+def _folding(ignore_case, fold_accents):
+    if ignore_case and fold_accents:
+        return lambda w: _unaccented(w.lower())
+    if ignore_case:
+        return str.lower
+    if fold_accents:
+        return _unaccented
+    return None
+
+
+def _unaccented(word):
+    if word.isascii():
+        return word
+    import unicodedata
+    return "".join(c for c in unicodedata.normalize("NFD", word) if not unicodedata.combining(c))
+
+
+#######################################
+# TEXT LEXICONS
+#######################################
+
+def read_lexicon(path, ignore_case=True, fold_accents=False):
+    # one word per line, blank lines skipped
+    # not through the shared normalizer, not to fill its cache
+    fold = _folding(ignore_case, fold_accents)
+    with open(path) as f:
+        if fold is not None:
+            return set(fold(l.strip()) for l in f if l.strip())
+        else:
+            return set(l.strip() for l in f if l.strip())
+
+
+#######################################
+# BINARY LEXICONS
+#######################################
+
+# binary images are an open-addressing hash table
+# that can be memory-mapped and probed in place
+#
+# header: magic, version, byte order, mode, slots, words
+# mode: 1 if ignore_case, plus 2 if fold_accents
+# slots: one uint32 per slot, offset of the word in the blob + 1
+#        (0 is an empty slot), hashed with crc32 and probed linearly
+# blob: utf-8 encoded words, each followed by a NUL byte
+
+_MAGIC = b"RPLX"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBcBxII")
+_ORDER = b"l" if sys.byteorder == "little" else b"b"
+EXTENSION = ".rlx"
+
+
+def compile_lexicon(src, dst, ignore_case=True, fold_accents=False):
+    # imported here, as most runs never compile anything
+    import tempfile
+    words = sorted(w.encode("utf-8") for w in read_lexicon(src, ignore_case, fold_accents))
+    n_slots = 1
+    while n_slots < 2 * len(words):
+        n_slots *= 2
+    mask = n_slots - 1
+    slots = array("I", bytes(4 * n_slots))
+    blob = bytearray()
+    for w in words:
+        i = zlib.crc32(w) & mask
+        while slots[i]:
+            i = (i + 1) & mask
+        slots[i] = len(blob) + 1
+        blob += w + b"\0"
+    # write aside and move, so concurrent readers never see half a file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(dst)))
+    try:
+        # mkstemp makes it readable by its owner only, but images
+        # are to be shared like any other file written in the folder
+        if hasattr(os, "fchmod"):
+            os.fchmod(fd, 0o666 & ~_UMASK)
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, _ORDER, _mode(ignore_case, fold_accents), n_slots, len(words)))
+            f.write(slots.tobytes())
+            f.write(blob)
+        os.replace(tmp, dst)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _read_umask():
+    # from /proc where there is one, as the only other way to read
+    # it is to set it, for the whole process, if just for a moment
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError):
+        pass
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+# read once, at import
+_UMASK = _read_umask()
+
+
+def _mode(ignore_case, fold_accents):
+    return (1 if ignore_case else 0) | (2 if fold_accents else 0)
+
+
+def compiled_path(src, ignore_case=True, fold_accents=False):
+    root, _ = os.path.splitext(src)
+    return root + (".lower" if ignore_case else "") + (".unaccented" if fold_accents else "") + EXTENSION
+
+
+def load_mapped(src, ignore_case=True, fold_accents=False):
+    # compiles the text lexicon next to it on first use, or whenever
+    # it is newer than the image, into a temporary folder if that one
+    # cannot be written or the image there cannot be read
+    dst = compiled_path(src, ignore_case, fold_accents)
+    try:
+        return _open_compiled(src, dst, ignore_case, fold_accents)
+    except OSError:
+        import hashlib, tempfile
+        digest = hashlib.sha1(os.path.abspath(dst).encode("utf-8")).hexdigest()
+        folder = os.path.join(tempfile.gettempdir(), "raposa")
+        os.makedirs(folder, exist_ok=True)
+        dst = os.path.join(folder, digest + EXTENSION)
+        return _open_compiled(src, dst, ignore_case, fold_accents)
+
+
+def _open_compiled(src, dst, ignore_case, fold_accents):
+    # an image that is fresh but cannot be used as it is (from another
+    # version or machine, in another mode, or cut short) is compiled again
+    if not _is_fresh(dst, src):
+        compile_lexicon(src, dst, ignore_case, fold_accents)
+    try:
+        lexicon = MappedLexicon(dst)
+        if lexicon.ignore_case == bool(ignore_case) and lexicon.fold_accents == bool(fold_accents):
+            return lexicon
+    except LexiconError:
+        pass
+    compile_lexicon(src, dst, ignore_case, fold_accents)
+    return MappedLexicon(dst)
+
+
+def _is_fresh(dst, src):
+    return os.path.exists(dst) and os.path.getmtime(dst) >= os.path.getmtime(src)
+
+
+class MappedLexicon:
+
+    # read-only set of words backed by a memory-mapped binary image
+    # pages are shared between every process mapping the same file
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < _HEADER.size:
+                raise LexiconError("Not a compiled lexicon: %s" % path)
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, order, mode, n_slots, n_words = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise LexiconError("Not a compiled lexicon: %s" % path)
+        if order != _ORDER:
+            raise LexiconError("Lexicon compiled on a machine with other byte order: %s" % path)
+        self.path = path
+        self.ignore_case = bool(mode & 1)
+        self.fold_accents = bool(mode & 2)
+        self._len = n_words
+        self._mask = n_slots - 1
+        self._blob = _HEADER.size + 4 * n_slots
+        if len(self._mm) < self._blob:
+            raise LexiconError("Compiled lexicon cut short: %s" % path)
+        self._slots = memoryview(self._mm)[_HEADER.size:self._blob].cast("I")
+
+    def __contains__(self, word):
+        w = word.encode("utf-8")
+        mm = self._mm
+        slots = self._slots
+        mask = self._mask
+        i = zlib.crc32(w) & mask
+        # compare along with the terminator, so prefixes do not match
+        w += b"\0"
+        while True:
+            offset = slots[i]
+            if offset == 0:
+                return False
+            start = self._blob + offset - 1
+            if mm[start:start + len(w)] == w:
+                return True
+            i = (i + 1) & mask
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        blob = self._mm[self._blob:]
+        for w in blob.split(b"\0")[:-1]:
+            yield w.decode("utf-8")
+
+    def __getstate__(self):
+        # map it again on unpickling instead of copying it over
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+
+#######################################
+# SHARED LEXICONS
+#######################################
+
+# lexicons read from files are shared by the whole process, keyed by
+# path, normalization mode and whether they are mapped, so filters using the
+# same file hold the same words, which are only loaded on first lookup
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class SharedLexicon:
+
+    def __init__(self, path, ignore_case=True, mapped=False, fold_accents=False):
+        self.path = path
+        self.ignore_case = ignore_case
+        self.fold_accents = fold_accents
+        self.mapped = mapped
+        self._words = None
+        self._lock = threading.Lock()
+        # those looking words up directly, told when they are evicted
+        self._holders = weakref.WeakSet()
+
+    @property
+    def loaded(self):
+        return self._words is not None
+
+    def load(self):
+        words = self._words
+        if words is None:
+            with self._lock:
+                if self._words is None:
+                    self._words = self._read()
+                words = self._words
+        return words
+
+    def hold(self, holder):
+        # the words, also handed to holder.held(), which is handed
+        # None instead when they are evicted, to ask for them again
+        with self._lock:
+            if self._words is None:
+                self._words = self._read()
+            self._holders.add(holder)
+            holder.held(self._words)
+            return self._words
+
+    def evict(self):
+        # next lookup will load it again
+        with self._lock:
+            self._words = None
+            for holder in list(self._holders):
+                holder.held(None)
+            self._holders.clear()
+
+    def _read(self):
+        if self.mapped:
+            return load_mapped(self.path, self.ignore_case, self.fold_accents)
+        return read_lexicon(self.path, self.ignore_case, self.fold_accents)
+
+    def __contains__(self, word):
+        words = self._words
+        if words is None:
+            words = self.load()
+        return word in words
+
+    def __len__(self):
+        return len(self.load())
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __reduce__(self):
+        # resolve to the registry of the process it ends up in
+        return (get_lexicon, (self.path, self.ignore_case, self.mapped, self.fold_accents))
+
+
+def get_lexicon(path, ignore_case=True, mapped=False, fold_accents=False):
+    key = (os.path.realpath(path), bool(ignore_case), bool(mapped), bool(fold_accents))
+    with _registry_lock:
+        lexicon = _registry.get(key)
+        if lexicon is None:
+            lexicon = _registry[key] = SharedLexicon(*key)
+    return lexicon
+
+
+def _matching(path, ignore_case, mapped, fold_accents):
+    if path is not None:
+        path = os.path.realpath(path)
+    with _registry_lock:
+        lexicons = list(_registry.values())
+    return [l for l in lexicons
+        if (path is None or l.path == path)
+        and (ignore_case is None or l.ignore_case == bool(ignore_case))
+        and (mapped is None or l.mapped == bool(mapped))
+        and (fold_accents is None or l.fold_accents == bool(fold_accents))]
+
+
+def preload(path=None, ignore_case=None, mapped=None, fold_accents=None):
+    # loads every registered lexicon matching the arguments (None = any)
+    # or registers and loads the given one if there was none yet
+    lexicons = _matching(path, ignore_case, mapped, fold_accents)
+    if not lexicons and path is not None:
+        lexicons = [get_lexicon(path,
+            True if ignore_case is None else ignore_case,
+            False if mapped is None else mapped,
+            False if fold_accents is None else fold_accents)]
+    for l in lexicons:
+        l.load()
+    return lexicons
+
+
+def evict(path=None, ignore_case=None, mapped=None, fold_accents=None):
+    # frees the words of every registered lexicon matching the arguments
+    # (None = any), filters using them load them again if needed
+    lexicons = _matching(path, ignore_case, mapped, fold_accents)
+    for l in lexicons:
+        l.evict()
+    return lexicons
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Compile text lexicons into binary images")
+    parser.add_argument("src", nargs="+", help="text lexicon, one word per line")
+    parser.add_argument("--case-sensitive", action="store_true", help="keep case instead of lowercasing")
+    parser.add_argument("--fold-accents", action="store_true", help="strip accents and other combining marks")
+    args = parser.parse_args()
+    for src in args.src:
+        dst = compiled_path(src, not args.case_sensitive, args.fold_accents)
+        compile_lexicon(src, dst, not args.case_sensitive, args.fold_accents)
+        print(dst)
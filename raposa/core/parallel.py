@@ -0,0 +1,68 @@
+import itertools
+import multiprocessing
+import os
+from collections import deque
+
+
+# pipeline run by this worker process, handed over by the pool
+# with fork it is inherited from the parent, copy-on-write,
+# so big dictionaries are neither pickled nor loaded again
+# otherwise it is pickled once per worker, when the pool starts
+_pipeline = None
+
+
+def _init_worker(pipeline):
+    global _pipeline
+    _pipeline = pipeline
+
+
+def _work(chunk):
+    return [t for text in chunk for t in _pipeline._pipe_text(text)]
+
+
+def _chunks(gen, size):
+    it = iter(gen)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class ParallelPipeline():
+
+    def __init__(self, pipeline, workers=None, chunk_size=1000, start_method=None):
+        self.pipeline = pipeline
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        if start_method is None and "fork" in multiprocessing.get_all_start_methods():
+            start_method = "fork"
+        self._start_method = start_method
+        # chunks sent out but not yet yielded, per worker
+        # keeps memory bounded when reading huge inputs
+        self._backlog = 2
+
+    # unlike BasicPipeline.pipe, this always takes an iterable of texts
+    # as there is nothing to spread otherwise
+
+    def pipe(self, texts):
+        ctx = multiprocessing.get_context(self._start_method)
+        if self._start_method == "fork":
+            # load lazy data now, so workers inherit it instead of
+            # each loading its own copy on first use
+            if hasattr(self.pipeline, "preload"):
+                self.pipeline.preload()
+        # never through a global here, so pools of different
+        # pipelines can run at the same time
+        pool = ctx.Pool(self.workers, initializer=_init_worker, initargs=(self.pipeline,))
+        try:
+            pending = deque()
+            for chunk in _chunks(texts, self.chunk_size):
+                pending.append(pool.apply_async(_work, (chunk,)))
+                if len(pending) >= self.workers * self._backlog:
+                    yield from pending.popleft().get()
+            while pending:
+                yield from pending.popleft().get()
+        finally:
+            pool.terminate()
+            pool.join()
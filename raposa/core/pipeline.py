@@ -1,29 +1,300 @@
 from collections.abc import Iterable
 
+from .batch import TokenBatch
+from .cache import LRUCache
+from .profiling import TubeStats, report
 from .tokenizers import BasicTokenizer
+from .tubes import BasicTube, InputError, RegexRemoval, MultiRegexRemoval
 
 class BasicPipeline():
 
-    def __init__(self, tubes=[], tokenizer=BasicTokenizer(), reads_from_gen=True):
+    def __init__(self, tubes=[], tokenizer=BasicTokenizer(), reads_from_gen=True, compiled=False, cache_size=None, slug="pipeline"):
         self.tubes = tubes
         self.tokenizer = tokenizer
         self._reads_from_gen = reads_from_gen
+        self.slug = slug
+        self._stats = None
+        self._plan = None
+        # with cache_size, what pure tubes make of each distinct token
+        # is kept and replayed when it shows up again, so only
+        # the tubes from the first impure one on run every time
+        self._cache_size = cache_size
+        self.cache = None
+        if compiled or cache_size:
+            self.compile()
 
-    def pipe(self, g):
+    @property
+    def pure(self):
+        # pure tubes give the same outcome for the same token, always,
+        # and have no side effects, so their outcome can be cached
+        return getattr(self.tokenizer, "pure", False) \
+          and all(getattr(t, "pure", False) for t in self.tubes)
+
+    def pipe(self, g, workers=None, chunk_size=1000):
+        # with workers, texts are spread in chunks over that many
+        # processes, and results come back in the same order
         gen_text = g if self._reads_from_gen else [g]
+        if workers is not None:
+            # a single text has nothing to spread
+            if not self._reads_from_gen:
+                raise InputError("Workers need a pipeline that reads from a generator of texts")
+            # multiprocessing is only imported when needed
+            from .parallel import ParallelPipeline
+            yield from ParallelPipeline(self, workers=workers, chunk_size=chunk_size).pipe(gen_text)
+            return
         for text in gen_text:
-            for token in self._into_tokens(text):
-                for t in self._process(token):
-                    yield self._pack(t, None)
+            yield from self._pipe_text(text)
+
+    def apipe(self, texts, batch_size=100, latency=0.05, executor=None, workers=None):
+        # async counterpart of pipe, for live streams, see aio.apipe
+        # like with workers, this always takes an iterable of texts
+        from .aio import apipe
+        return apipe(self, texts, batch_size=batch_size, latency=latency, executor=executor, workers=workers)
+
+    def _pipe_text(self, text):
+        stats = self._stats
+        if stats is not None:
+            stats.units_in += 1
+        for token in self._into_tokens(text):
+            for t in self._process(token):
+                if stats is not None:
+                    stats.units_out += 1
+                yield self._pack(t, None)
+
+    def pipe_batch(self, units, keep=None):
+        # batch counterpart of pipe, see BasicTube.pipe_batch
+        # units are texts here, and what comes back are the tokens
+        texts = units if keep is None else [u for u, k in zip(units, keep) if k]
+        units = [token for text in texts for token in self._into_tokens(text)]
+        keep = [True] * len(units)
+        for t in self.tubes:
+            if hasattr(t, "pipe_batch"):
+                units, keep = t.pipe_batch(units, keep)
+            else:
+                units = [o for u, k in zip(units, keep) if k for o in t.pipe([u])]
+                keep = [True] * len(units)
+        units = [self._pack(u, None) if k else u for u, k in zip(units, keep)]
+        return units, keep
+
+    def pipe_columns(self, batch):
+        # columnar counterpart of pipe_batch, see batch.TokenBatch
+        # takes texts, or a TokenBatch of them, and returns one of tokens
+        # (dead ones included, see TokenBatch.values to leave them out)
+        if not isinstance(batch, TokenBatch):
+            batch = TokenBatch(batch)
+        if type(self.tokenizer) is not BasicTokenizer:
+            batch = batch.split(self._into_tokens)
+        for t in self.tubes:
+            if hasattr(t, "pipe_columns"):
+                batch = t.pipe_columns(batch)
+            else:
+                batch = batch.through(t)
+        return batch
+
+    def preload(self):
+        for t in self.tubes:
+            if hasattr(t, "preload"):
+                t.preload()
+
+    def profile(self, enabled=True):
+        # counts units in and out, discards, tags and time spent
+        # per tube, nested pipelines included, until disabled again
+        # (counters start over every time it is enabled)
+        # compiled pipelines are compiled again, so their cache is emptied
+        for t in self.tubes:
+            if isinstance(t, BasicPipeline):
+                t.profile(enabled)
+            else:
+                t._stats = TubeStats(getattr(t, "slug", type(t).__name__)) if enabled else None
+        self._stats = TubeStats(self.slug) if enabled else None
+        if self._plan is not None:
+            self.compile()
+        return self
+
+    def profile_report(self, sort="wall", file=None):
+        # what was counted while profiling, see profiling.report
+        return report(self, sort=sort, file=file)
+
+    def compile(self, cache_size=None):
+        # turns the tube chain into a flat plan of steps, once,
+        # so tokens are not run through a new chain of generators each
+        # call again after modifying self.tubes for changes to be seen
+        if cache_size is not None:
+            self._cache_size = cache_size
+        self._plan = []
+        # steps where tokens come in, from tokenizers
+        entries = [0] if type(self.tokenizer) is not BasicTokenizer else []
+        self._build_plan(self._plan, entries)
+        # cached up to the first step that is not pure
+        self._cache_ends = {}
+        for start in entries:
+            end = start
+            while end < len(self._plan) and self._plan[end][5]:
+                end += 1
+            if end > start:
+                self._cache_ends[start] = end
+        if self._cache_size:
+            self.cache = LRUCache(self._cache_size)
+        return self
+
+    def __getstate__(self):
+        # plans hold bound methods and lambdas, so they are
+        # rebuilt on unpickling instead of being pickled along
+        # same for caches, which hold a lock, and start empty
+        state = self.__dict__.copy()
+        state["_plan"] = None
+        state["cache"] = None
+        state["_compiled"] = self._plan is not None
+        return state
+
+    def __setstate__(self, state):
+        compiled = state.pop("_compiled", False)
+        self.__dict__.update(state)
+        if compiled:
+            self.compile()
 
     def _process(self, token):
+        if self._plan is not None:
+            return self._run_plan(token, 0, len(self._plan), [])
         tokens = (t for t in [token])
         for t in self.tubes:
-            tokens = t.pipe(tokens)
-        yield from tokens
+            if self._stats is not None and not _profiles_itself(t):
+                tokens = _profiled_pipe(t, tokens)
+            else:
+                tokens = t.pipe(tokens)
+        return tokens
 
     def _into_tokens(self, text):
         return self.tokenizer.split(text)
 
     def _pack(self, token, context):
         return token
+
+    # a plan is a list of (process, fan_out, discard, inverse, tag, pure)
+    # either process is a tube's _process, and BasicTube.pipe semantics
+    # are applied inline with its discard, inverse and tag key (or None)
+    # or it is None and fan_out takes a unit and returns an iterable,
+    # for anything that may yield other than exactly one unit
+    # pure tells whether the step comes from a pure tube or tokenizer
+
+    def _build_plan(self, plan, entries):
+        # while profiling, tubes run through their counters instead
+        for t in self.tubes:
+            if isinstance(t, BasicTube) and type(t).pipe is BasicTube.pipe \
+              and type(t)._step is BasicTube._step and t._stats is None:
+                tag = "t_"+t.slug+"_match" if t._tag else None
+                plan.append((t._process, None, t._discard, t._inverse, tag, t.pure))
+            elif isinstance(t, BasicTube) and type(t).pipe is BasicTube.pipe:
+                plan.append((None, lambda unit, t=t: _listed(t._profiled_step(unit)), None, None, None, t.pure))
+            elif isinstance(t, BasicPipeline) and t._is_inlinable():
+                # nested pipelines get flattened into this plan
+                # their counters are not cached, so they count every unit
+                if t._stats is not None:
+                    plan.append((None, t._stats.count_in, None, None, None, False))
+                if type(t.tokenizer) is not BasicTokenizer:
+                    plan.append((None, t._into_tokens, None, None, None, getattr(t.tokenizer, "pure", False)))
+                    entries.append(len(plan))
+                t._build_plan(plan, entries)
+                if t._stats is not None:
+                    plan.append((None, t._stats.count_out, None, None, None, False))
+            elif getattr(t, "_stats", None) is not None and not _profiles_itself(t):
+                plan.append((None, lambda unit, t=t: t._stats.pipe(t.pipe, unit), None, None, None, getattr(t, "pure", False)))
+            else:
+                # tubes that override pipe are fed one unit at a time,
+                # same as they are when running uncompiled
+                plan.append((None, lambda unit, t=t: t.pipe([unit]), None, None, None, getattr(t, "pure", False)))
+
+    def _is_inlinable(self):
+        cls = type(self)
+        return self._reads_from_gen \
+          and cls.pipe is BasicPipeline.pipe \
+          and cls._process is BasicPipeline._process \
+          and cls._into_tokens is BasicPipeline._into_tokens \
+          and cls._pack is BasicPipeline._pack
+
+    def _run_plan(self, unit, start, stop, out, cache=True):
+        # runs steps from start to stop, appending what comes out to out
+        if cache and self.cache is not None and type(unit) == str and start in self._cache_ends:
+            return self._run_cached(unit, start, stop, out)
+        plan = self._plan
+        for i in range(start, stop):
+            process, fan_out, discard, inverse, tag, _ = plan[i]
+            if process is None:
+                for u in fan_out(unit):
+                    self._run_plan(u, i + 1, stop, out, cache)
+                return out
+            new_unit = process(unit)
+            # same as in BasicTube.pipe
+            if discard and not (inverse ^ bool(new_unit)):
+                return out
+            if new_unit:
+                unit = new_unit
+            if tag is not None:
+                unit[tag] = bool(new_unit)
+        out.append(unit)
+        return out
+
+    def _run_cached(self, token, start, stop, out):
+        end = self._cache_ends[start]
+        key = (start, token)
+        cached = self.cache.get(key)
+        if cached is None:
+            units = self._run_plan(token, start, end, [], False)
+            self.cache.put(key, tuple(_copy(u) for u in units))
+        else:
+            units = [_copy(u) for u in cached]
+        if end == stop:
+            out.extend(units)
+        else:
+            for u in units:
+                self._run_plan(u, end, stop, out)
+        return out
+
+
+def _profiles_itself(tube):
+    return isinstance(tube, BasicTube) and type(tube).pipe is BasicTube.pipe \
+      or isinstance(tube, BasicPipeline) and type(tube).pipe is BasicPipeline.pipe
+
+
+def _profiled_pipe(tube, units):
+    for unit in units:
+        yield from tube._stats.pipe(tube.pipe, unit)
+
+
+def _fusable(tube):
+    # plain removals, which can be run as one MultiRegexRemoval
+    return isinstance(tube, RegexRemoval) and type(tube)._process is RegexRemoval._process \
+      and type(tube).pipe is BasicTube.pipe and type(tube)._step is BasicTube._step \
+      and tube._stats is None and tube._discard and not tube._inverse and not tube._tag \
+      and tube.regex.groups == 0
+
+
+def _fused(tubes):
+    # runs of consecutive plain removals sharing flags are merged,
+    # so most tokens are scanned once instead of once per removal
+    run = []
+    for t in tubes:
+        if _fusable(t) and (not run or t.regex.flags == run[0].regex.flags):
+            run.append(t)
+            continue
+        yield from _merged(run)
+        run = [t] if _fusable(t) else []
+        if not run:
+            yield t
+    yield from _merged(run)
+
+
+def _merged(run):
+    if len(run) > 1:
+        return [MultiRegexRemoval(run, slug="+".join(t.slug for t in run))]
+    return run
+
+
+def _listed(unit):
+    return [] if unit is None else [unit]
+
+
+def _copy(unit):
+    # units replayed from a cache must not be shared, as they may be
+    # changed later on; str are immutable, dicts are copied shallowly
+    return dict(unit) if type(unit) == dict else unit
@@ -0,0 +1,117 @@
+from time import perf_counter, process_time
+
+
+#
+# Counters and timers per tube, filled in while a pipeline is
+# being profiled (see BasicPipeline.profile), and their report
+#
+# only what runs in this process is counted: tokens replayed from
+# a pipeline cache, or run by worker processes, do not show up
+# counters are not locked either, so threads may lose some counts
+#
+
+COLUMNS = ["units_in", "units_out", "discarded", "tagged", "wall", "cpu"]
+
+
+class TubeStats:
+
+    def __init__(self, slug):
+        self.slug = slug
+        self.reset()
+
+    def reset(self):
+        self.units_in = 0
+        self.units_out = 0
+        self.discarded = 0
+        self.tagged = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+
+    def step(self, step, unit, tag=None):
+        # times a BasicTube._step, which returns None if discarded
+        wall, cpu = perf_counter(), process_time()
+        out_unit = step(unit)
+        self.wall += perf_counter() - wall
+        self.cpu += process_time() - cpu
+        self.units_in += 1
+        if out_unit is None:
+            self.discarded += 1
+        else:
+            self.units_out += 1
+            if tag is not None and out_unit[tag]:
+                self.tagged += 1
+        return out_unit
+
+    def pipe(self, pipe, unit):
+        # times anything that pipes units, fed one at a time
+        wall, cpu = perf_counter(), process_time()
+        out_units = list(pipe([unit]))
+        self.wall += perf_counter() - wall
+        self.cpu += process_time() - cpu
+        self.units_in += 1
+        self.units_out += len(out_units)
+        if not out_units:
+            self.discarded += 1
+        return out_units
+
+    def count_in(self, unit):
+        self.units_in += 1
+        return [unit]
+
+    def count_out(self, unit):
+        self.units_out += 1
+        return [unit]
+
+    def as_row(self, depth=0):
+        row = {"slug": self.slug, "depth": depth}
+        for c in COLUMNS:
+            row[c] = getattr(self, c)
+        return row
+
+
+def report(pipeline, sort="wall", file=None):
+    # rows for the pipeline and everything in it, depth first, as dicts
+    # with slug, depth and COLUMNS; pipelines add up what is in them
+    # siblings are sorted by the given column, descending (None: as is)
+    # and if file is given, a table is printed there too
+    rows = _rows(pipeline, sort, 0)
+    if file is not None:
+        print(format_report(rows, getattr(pipeline, "cache", None)), file=file)
+    return rows
+
+
+def format_report(rows, cache=None):
+    total = rows[0]["wall"] if rows else 0.0
+    lines = ["%-32s %10s %10s %10s %10s %10s %10s %7s" % (
+        "tube", "in", "out", "discarded", "tagged", "wall (s)", "cpu (s)", "wall %")]
+    for r in rows:
+        lines.append("%-32s %10d %10d %10d %10d %10.3f %10.3f %6.1f%%" % (
+            "  " * r["depth"] + r["slug"],
+            r["units_in"], r["units_out"], r["discarded"], r["tagged"],
+            r["wall"], r["cpu"], 100 * r["wall"] / total if total else 0.0))
+    if cache is not None:
+        s = cache.stats()
+        lines.append("cache: %d hits, %d misses (%.1f%%), %d evictions" % (
+            s["hits"], s["misses"], 100 * s["hit_rate"], s["evictions"]))
+    return "\n".join(lines)
+
+
+def _rows(pipeline, sort, depth):
+    groups = []
+    for t in pipeline.tubes:
+        if hasattr(t, "tubes") and hasattr(t, "profile"):
+            groups.append(_rows(t, sort, depth + 1))
+        else:
+            stats = getattr(t, "_stats", None) or TubeStats(_slug(t))
+            groups.append([stats.as_row(depth + 1)])
+    if sort is not None:
+        groups.sort(key=lambda g: g[0][sort], reverse=True)
+    head = (pipeline._stats or TubeStats(pipeline.slug)).as_row(depth)
+    # units in and out are the pipeline's own, the rest adds up
+    for c in ["discarded", "tagged", "wall", "cpu"]:
+        head[c] = sum(g[0][c] for g in groups)
+    return [head] + [r for g in groups for r in g]
+
+
+def _slug(tube):
+    return getattr(tube, "slug", type(tube).__name__)
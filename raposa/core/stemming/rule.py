@@ -1,7 +1,5 @@
 import re
 
-import exrex
-
 #######################################
 # MAIN CLASS
 #######################################
@@ -14,11 +12,32 @@ class Rule:
 
     def __init__(self, suffix, min_rem, base, exceptions):
         self.suffix = suffix
-        self._suffix_regex = _make_regex(min_rem, self.suffix)
         self.base = base
-        self._base_regex = _make_regex(min_rem, self.base)
         self._min_rem = min_rem # possibly not needed anymore?
         self.exceptions = exceptions
+        self._exceptions = frozenset(exceptions)
+        # literal suffixes and bases are matched without regexes
+        # and the ones that are not are expanded just once
+        # regexes and expansions are built on first use, see __getattr__
+        self._suffix_literal = _is_literal(self.suffix)
+        self._base_literal = _is_literal(self.base)
+
+
+    def __getattr__(self, name):
+        # only called for attributes not set yet, which are then
+        # set, so rules that are never tried never build them
+        if name == "_suffix_regex":
+            value = _make_regex(self._min_rem, self.suffix)
+        elif name == "_base_regex":
+            value = _make_regex(self._min_rem, self.base)
+        elif name == "_suffixes":
+            value = [self.suffix] if self._suffix_literal else list(_expand(self.suffix))
+        elif name == "_bases":
+            value = [self.base] if self._base_literal else list(_expand(self.base))
+        else:
+            raise AttributeError(name)
+        setattr(self, name, value)
+        return value
 
 
     def __hash__(self):
@@ -29,27 +48,36 @@ class Rule:
     # APPLY RULE FORWARD/BACKWARDS IF ABLE
     ########################################
 
+    # the word itself is taken literally, only the rule
+    # gets expanded (e.g. a suffix like "(í|i)simo")
+
     def try_regress(self, w):
-        m = self._applies_regress(w)
-        if m:
-            word = self._suffix_regex.sub(self.base, w)
-            words = _expand(word)
-            return True, m.group(), words
+        start, end = self._applies_regress(w)
+        if start >= 0:
+            words = [w[:start] + base + w[end:] for base in self._bases]
+            return True, w[start:end], words
         return False, None, [w]
 
 
+    def regress_first(self, w):
+        # as try_regress, but gives back only the first word
+        start, end = self._applies_regress(w)
+        if start >= 0:
+            return True, w[start:end], w[:start] + self._bases[0] + w[end:]
+        return False, None, w
+
+
     def try_generate(self, w):
-        m = self._applies_generate(w)
-        if m:
-            word = self._base_regex.sub(self.suffix, w)
-            words = _expand(word)
+        start, end = self._applies_generate(w)
+        if start >= 0:
+            words = [w[:start] + suffix + w[end:] for suffix in self._suffixes]
             # exceptions are words not generated by this rule
-            words = [w for w in words if w not in self.exceptions]
+            words = [w for w in words if w not in self._exceptions]
             if words == []:
                 # nope, wrong rule
                 # e.g. from 'can' we don't get 'canela'
-                return False, m.group(), [w]
-            return True, m.group(), words
+                return False, w[start:end], [w]
+            return True, w[start:end], words
         return False, None, [w]
 
 
@@ -57,23 +85,122 @@ class Rule:
     # CHECK IF RULE CAN BE APPLIED
     #######################################
 
+    # both give back where the matching part starts and ends
+    # or (-1, -1) if the rule does not apply
+
     def _applies_regress(self, w):
-        return w not in self.exceptions \
-          and self._suffix_regex.search(w)
+        if w in self._exceptions:
+            return -1, -1
+        if self._suffix_literal:
+            return _literal_span(w, self.suffix, self._min_rem)
+        return _regex_span(w, self._suffix_regex)
 
 
     def _applies_generate(self, w):
-        return self._base_regex.search(w)
+        if self._base_literal:
+            return _literal_span(w, self.base, self._min_rem)
+        return _regex_span(w, self._base_regex)
+
+
+    #######################################
+    # LITERAL FORMS OF THE SUFFIX
+    #######################################
+
+    def endings(self):
+        # every string the suffix may match, or None if too many
+        if len(self._suffixes) > _MAX_ENDINGS:
+            return None
+        return self._suffixes
+
+
+#######################################
+# RULE LOOKUP BY SUFFIX
+#######################################
+
+class RuleIndex:
+
+    # a block of rules indexed by a trie of their reversed suffixes
+    # so walking it from the end of a word finds the only rules that
+    # may apply, instead of trying every single one of them
+    # candidates are given back in the same order as in the block
+
+    def __init__(self, rules):
+        # the trie is built on first lookup
+        self.rules = rules
+        self._always = None
+        self._trie = None
+
+
+    def _build(self):
+        always = []
+        trie = {}
+        for i, rule in enumerate(self.rules):
+            endings = rule.endings()
+            if endings is None:
+                always.append(i)
+                continue
+            for ending in endings:
+                node = trie
+                for c in reversed(ending):
+                    node = node.setdefault(c, {})
+                # None can never be a character, so it holds the rules
+                node.setdefault(None, []).append(i)
+        # trie last, as it tells other threads it is all there
+        self._always = always
+        self._trie = trie
+
+
+    def candidates(self, w):
+        if self._trie is None:
+            self._build()
+        found = self._always + self._trie.get(None, [])
+        node = self._trie
+        for c in reversed(w):
+            node = node.get(c)
+            if node is None:
+                break
+            found += node.get(None, [])
+        return [self.rules[i] for i in sorted(set(found))]
+
+
+    def __iter__(self):
+        return iter(self.rules)
+
+
+    def __len__(self):
+        return len(self.rules)
 
 
 #######################################
 # REGEX AUX FUNCTIONS
 #######################################
 
+_MAX_ENDINGS = 1000
+_SPECIAL = set(".^$*+?{}[]\\|()")
+
+
 def _expand(w):
     # returns all words that may match the regex
+    import exrex
     return exrex.generate(w)
 
 
+def _is_literal(s):
+    return not any(c in _SPECIAL for c in s)
+
+
+def _literal_span(w, s, min_rem):
+    # same as searching for (?<=.{min_rem})s$
+    start = len(w) - len(s)
+    if start >= min_rem and w.endswith(s):
+        return start, len(w)
+    return -1, -1
+
+
+def _regex_span(w, regex):
+    m = regex.search(w)
+    return m.span() if m else (-1, -1)
+
+
 def _make_regex(previous, main_string):
     return re.compile("(?<=" + '.'*previous + ")" + main_string + "$")
@@ -1,17 +1,23 @@
 import itertools
 import re
 
-from nltk import word_tokenize, sent_tokenize
-
 
 class BasicTokenizer():
 
+	# same tokens for the same text, see BasicTube.pure
+	pure = True
+
 	def __init__(self):
 		pass
 
 	def split(self, text):
 		return self._process(text)
 
+	def spans(self, text):
+		# (start, end) of each token in text, as a generator
+		# subclasses may find them without splitting the text first
+		return _align(text, self._process(text))
+
 	def _process(self, text):
 		return [text]
 
@@ -30,23 +36,34 @@ class WhitespaceTokenizer(BasicTokenizer):
 	def _process(self, text):
 		return text.split()
 
+	def spans(self, text):
+		return (m.span() for m in _NON_WHITESPACE.finditer(text))
+
 
 class NewlineTokenizer(BasicTokenizer):
 
 	def _process(self, text):
 		return text.splitlines()
 
+	def spans(self, text):
+		start = 0
+		for m in _LINE_BREAK.finditer(text):
+			yield start, m.start()
+			start = m.end()
+		if start < len(text):
+			yield start, len(text)
+
 
 class NltkWordTokenizer(BasicTokenizer):
 
 	def _process(self, text):
-		return word_tokenize(text)
+		return _nltk().word_tokenize(text)
 
 
 class NltkSentTokenizer(BasicTokenizer):
 
 	def _process(self, text):
-		return sent_tokenize(text)
+		return _nltk().sent_tokenize(text)
 
 
 class RegexTokenizer(BasicTokenizer):
@@ -56,6 +73,51 @@ class RegexTokenizer(BasicTokenizer):
 			self.regex = regex
 		else:
 			self.regex = re.compile(regex)
+		super().__init__()
 
 	def _process(self, ctxt):
 		return [s for s in self.regex.split(ctxt) if s]
+
+	def spans(self, text):
+		if self.regex.groups:
+			# groups are tokens too when splitting
+			return super().spans(text)
+		return self._between(text)
+
+	def _between(self, text):
+		start = 0
+		for m in self.regex.finditer(text):
+			if m.start() > start:
+				yield start, m.start()
+			start = max(start, m.end())
+		if start < len(text):
+			yield start, len(text)
+
+
+def _nltk():
+	# nltk takes long to import, so only tokenizers using it do,
+	# on first use (imports after that are just a lookup)
+	import nltk
+	return nltk
+
+
+_NON_WHITESPACE = re.compile(r'\S+')
+
+# same line boundaries as str.splitlines
+_LINE_BREAK = re.compile('\r\n|[\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]')
+
+
+def _align(text, tokens):
+	# spans of tokens as found, in order, in the text
+	# for tokenizers that do not keep track of them
+	pos = 0
+	for t in tokens:
+		start = text.find(t, pos)
+		if start < 0 and t in ("``", "''"):
+			# nltk turns double quotes into these
+			start = text.find('"', pos)
+			t = '"'
+		if start < 0:
+			raise ValueError("Token not found in text: %r" % t)
+		pos = start + len(t)
+		yield start, pos
@@ -1,6 +1,12 @@
 import re
 
-import emoji
+try:
+	from re import _parser as sre_parse
+except ImportError:
+	import sre_parse
+
+from . import lexicons
+from .emojis import get_index
 
 
 class TubeError(Exception):
@@ -25,6 +31,17 @@ class BasicTube:
     # t_FILTER_match is reserved
     # discard decision is saved there automatically
 
+    # pure tubes give the same outcome for the same unit every time
+    # and touch nothing but the unit, so pipelines may cache them
+	pure = False
+
+	# counters while being profiled, see profiling.TubeStats
+	_stats = None
+
+	# whether what _process_vals stands for hands back the value alone,
+	# dict units included, as untagged removals do
+	_unwraps = False
+
 	def __init__(self, tag=False, discard=True, inverse=False, slug="base", **kwargs):
 		self._discard = discard
 		self.slug = slug
@@ -32,32 +49,140 @@ class BasicTube:
 		self._tag = tag
 
 	def pipe(self, gen_unit):
+		if self._stats is not None:
+			for unit in gen_unit:
+				out_unit = self._profiled_step(unit)
+				if out_unit is not None:
+					yield out_unit
+			return
+		# same as _step, kept inline as it runs for every unit
 		for unit in gen_unit:
 			new_unit = self._process(unit)
-			out_unit = new_unit or unit
-			# if it shouldn't discard, allow through
-			# otherwise, allow only if a new unit was produced
-			# [other way around if inverse is enabled (^ = XOR)]
 			if (not self._discard or (self._inverse ^ bool(new_unit))):
+				out_unit = new_unit or unit
 				if self._tag:
 					out_unit["t_"+self.slug+"_match"] = bool(new_unit)
 				yield out_unit
 
+	def _step(self, unit):
+		# processes a single unit, returning None if discarded
+		# this is what pipelines call directly when compiled
+		new_unit = self._process(unit)
+		# if it shouldn't discard, allow through
+		# otherwise, allow only if a new unit was produced
+		# [other way around if inverse is enabled (^ = XOR)]
+		if (not self._discard or (self._inverse ^ bool(new_unit))):
+			out_unit = new_unit or unit
+			if self._tag:
+				out_unit["t_"+self.slug+"_match"] = bool(new_unit)
+			return out_unit
+		return None
+
+	def _profiled_step(self, unit):
+		return self._stats.step(self._step, unit, "t_"+self.slug+"_match" if self._tag else None)
+
+	def pipe_batch(self, units, keep=None):
+		# batch counterpart of pipe, for lists of units
+		# keep is a mask of which units are still alive (default: all)
+		# returns the list of units and the mask, both updated
+		# discarded units stay in place, with their flag off
+		units = list(units)
+		keep = [True] * len(units) if keep is None else list(keep)
+		if type(self).pipe is not BasicTube.pipe:
+			# may not be one-to-one, so the lists come back compacted
+			units = [o for u, k in zip(units, keep) if k for o in self.pipe([u])]
+			return units, [True] * len(units)
+		ixs = [i for i, k in enumerate(keep) if k]
+		new_units = self._process_batch([units[i] for i in ixs])
+		tag = "t_"+self.slug+"_match" if self._tag else None
+		# same as in pipe
+		for i, new_unit in zip(ixs, new_units):
+			if self._discard and not (self._inverse ^ bool(new_unit)):
+				keep[i] = False
+				continue
+			if new_unit:
+				units[i] = new_unit
+			if tag is not None:
+				units[i][tag] = bool(new_unit)
+		return units, keep
+
+	def pipe_columns(self, batch):
+		# columnar counterpart of pipe_batch, see batch.TokenBatch
+		# tubes that cannot work on values alone go through units
+		ixs = batch.alive()
+		new_vals = NotImplemented
+		if type(self).pipe is BasicTube.pipe:
+			new_vals = self._process_vals([batch.vals[i] for i in ixs])
+		if new_vals is NotImplemented:
+			return batch.through(self)
+		vals = batch.vals
+		keep = batch.keep
+		dicts = batch.dicts
+		unwraps = self._unwraps
+		tag = batch.column("t_"+self.slug+"_match") if self._tag else None
+		# same as in pipe, where dict units are truthy even if empty
+		for i, new_val in zip(ixs, new_vals):
+			new = new_val is not None if dicts[i] else bool(new_val)
+			if self._discard and not (self._inverse ^ new):
+				keep[i] = False
+				continue
+			if new:
+				vals[i] = new_val
+				if unwraps and dicts[i]:
+					batch.unwrap(i)
+			if tag is not None:
+				tag[i] = new
+		return batch
+
+	def preload(self):
+		# tubes with data loaded lazily load it here
+		# e.g. before forking worker processes that should share it
+		pass
+
 	def _process(self, unit):
 		return None
 
+	def _process_batch(self, units):
+		# subclasses may override this with a faster equivalent
+		return [self._process(u) for u in units]
+
+	def _process_vals(self, vals):
+		# what _process would return for each value as a str unit
+		# (None where it returns None) or NotImplemented if unsupported
+		return NotImplemented
+
+
+def _only_str(units):
+	return set(map(type, units)) <= {str}
+
 
 class ValAdaptor(BasicTube):
 
+	pure = True
+
 	def __init__(self, slug="val", **kwargs):
 		super().__init__(slug=slug, **kwargs)
 
 	def _process(self, unit):
 		return {"val": unit}
 
+	def _process_batch(self, units):
+		return [{"val": u} for u in units]
+
+	def _process_vals(self, vals):
+		# values are never empty units once wrapped
+		return NotImplemented if "" in vals else list(vals)
+
+	def pipe_columns(self, batch):
+		batch = super().pipe_columns(batch)
+		batch.dicts = [True] * len(batch)
+		return batch
+
 
 class LowercaseAdaptor(BasicTube):
 
+	pure = True
+
 	def __init__(self, slug="lower", **kwargs):
 		super().__init__(slug=slug, **kwargs)
 
@@ -68,9 +193,19 @@ class LowercaseAdaptor(BasicTube):
 			unit["val"] = unit["val"].lower()
 			return unit
 
+	def _process_batch(self, units):
+		if _only_str(units):
+			return list(map(str.lower, units))
+		return super()._process_batch(units)
+
+	def _process_vals(self, vals):
+		return list(map(str.lower, vals))
+
 
 class UppercaseAdaptor(BasicTube):
 
+	pure = True
+
 	def __init__(self, slug="upper", **kwargs):
 		super().__init__(slug=slug, **kwargs)
 
@@ -81,9 +216,19 @@ class UppercaseAdaptor(BasicTube):
 			unit["val"] = unit["val"].upper()
 			return unit
 
+	def _process_batch(self, units):
+		if _only_str(units):
+			return list(map(str.upper, units))
+		return super()._process_batch(units)
+
+	def _process_vals(self, vals):
+		return list(map(str.upper, vals))
+
 
 class RegexFilter(BasicTube):
 
+	pure = True
+
 	def __init__(self, regex, compiled=False, slug="regex", **kwargs):
 		if compiled:
 			self.regex = regex
@@ -94,6 +239,14 @@ class RegexFilter(BasicTube):
 	def _process(self, unit):
 		return None if self.regex.fullmatch(unit["val"]) else unit
 
+	def _process_batch(self, units):
+		fullmatch = self.regex.fullmatch
+		return [None if fullmatch(u["val"]) else u for u in units]
+
+	def _process_vals(self, vals):
+		fullmatch = self.regex.fullmatch
+		return [None if fullmatch(v) else v for v in vals]
+
 
 class NumberFilter(RegexFilter):
 
@@ -119,14 +272,27 @@ class UrlFilter(RegexFilter):
 		super().__init__(r'https?://\S+', slug=slug, **kwargs)
 
 
-class EmojiFilter(RegexFilter):
+class EmojiFilter(BasicTube):
+
+	pure = True
+
+	# looks emoji up in an index built once from the emoji data
+	# rather than trying a regex of every emoji on every character
 
 	def __init__(self, slug="emoji", **kwargs):
-		rx = emoji.get_emoji_regexp()
-		super().__init__(rx, compiled=True, slug=slug, **kwargs)
+		super().__init__(slug=slug, **kwargs)
+		self._index = get_index()
 
 	def _process(self, unit):
-		return None if all([self.regex.fullmatch(c) for c in unit["val"]]) else unit
+		return None if self._index.only(unit["val"]) else unit
+
+	def _process_batch(self, units):
+		only = self._index.only
+		return [None if only(u["val"]) else u for u in units]
+
+	def _process_vals(self, vals):
+		only = self._index.only
+		return [None if only(v) else v for v in vals]
 
 
 class PunctFilter(RegexFilter):
@@ -137,6 +303,8 @@ class PunctFilter(RegexFilter):
 
 class RegexRemoval(RegexFilter):
 
+	_unwraps = True
+
 	def __init__(self, regex, slug="regexrem", **kwargs):
 		super().__init__(regex, slug=slug, **kwargs)
 
@@ -152,12 +320,53 @@ class RegexRemoval(RegexFilter):
 		else:
 			return None if after == "" else after
 
+	def _process_batch(self, units):
+		if self._tag:
+			return [self._process(u) for u in units]
+		sub = self.regex.sub
+		return [sub('', u if type(u) == str else u["val"]) or None for u in units]
+
+	def _process_vals(self, vals):
+		if self._tag:
+			return NotImplemented
+		sub = self.regex.sub
+		return [sub('', v) or None for v in vals]
+
+
+class EmojiRemoval(BasicTube):
+
+	pure = True
+	_unwraps = True
 
-class EmojiRemoval(RegexRemoval):
+	# not a RegexRemoval, so it cannot be merged into a MultiRegexRemoval:
+	# every emoji as one more alternative there is far slower than this
 
 	def __init__(self, slug="emojirem", **kwargs):
-		rx = emoji.get_emoji_regexp()
-		super().__init__(rx, compiled=True, slug=slug, **kwargs)
+		super().__init__(slug=slug, **kwargs)
+		self._index = get_index()
+
+	def _process(self, unit):
+		before = unit if type(unit) == str else unit["val"]
+		after = self._index.remove(before)
+		if self._tag:
+			unit["f_"+self.slug+"_before"] = before
+			unit["f_"+self.slug+"_after"] = after
+			unit["val"] = after
+			return None if after == "" else unit
+		else:
+			return None if after == "" else after
+
+	def _process_batch(self, units):
+		if self._tag:
+			return [self._process(u) for u in units]
+		remove = self._index.remove
+		return [remove(u if type(u) == str else u["val"]) or None for u in units]
+
+	def _process_vals(self, vals):
+		if self._tag:
+			return NotImplemented
+		remove = self._index.remove
+		return [remove(v) or None for v in vals]
 
 
 class NumberRemoval(RegexRemoval):
@@ -183,8 +392,132 @@ class UrlRemoval(RegexRemoval):
 		super().__init__(r'https?://\S+', slug=slug, **kwargs)
 
 
+class MultiRegexRemoval(RegexRemoval):
+
+	# merges several RegexRemovals into a single alternation, to find
+	# out in one scan whether any of them has something to remove
+	# only texts where one does go through each of them, one after
+	# the other, so the outcome is that of piping them in that order
+	# patterns must share flags and not use numbered backreferences
+	# members must be untagged, discard and not be inverted, as they are
+	# by default: tag the merged removal to tag each of them instead
+
+	def __init__(self, removals, slug="multirem", **kwargs):
+		if len(removals) == 0:
+			raise InputError("At least one RegexRemoval is needed")
+		parts = []
+		firsts = []
+		for i, r in enumerate(removals):
+			if not isinstance(r, RegexRemoval):
+				raise InputError("Only RegexRemovals can be merged")
+			if not r._discard or r._inverse or r._tag:
+				raise InputError("Only untagged removals that discard and are not inverted can be merged")
+			if r.regex.flags != removals[0].regex.flags:
+				raise InputError("Only patterns with the same flags can be merged")
+			parts.append("(?:%s)" % r.regex.pattern)
+			firsts.append(_first_chars(r.regex))
+		rx = "|".join(parts)
+		# if we know every character a match can start with, checking
+		# for those first is much cheaper than trying each pattern
+		if all(f is not None for f in firsts):
+			rx = "(?=[%s])(?:%s)" % ("".join(sorted(set().union(*firsts))), rx)
+		rx = re.compile(rx, removals[0].regex.flags)
+		self._members = [(r.regex.sub, r.slug) for r in removals]
+		super().__init__(rx, compiled=True, slug=slug, **kwargs)
+
+	def _afters(self, text):
+		# what each removal leaves behind, up to the one that leaves
+		# nothing (as that one discards the unit), or None if none matches
+		if self.regex.search(text) is None:
+			return None
+		afters = []
+		for sub, _ in self._members:
+			text = sub('', text)
+			afters.append(text)
+			if text == "":
+				break
+		return afters
+
+	def _after(self, text):
+		afters = self._afters(text)
+		return text if afters is None else afters[-1]
+
+	def _process(self, unit):
+		before = unit if type(unit) == str else unit["val"]
+		if not self._tag:
+			after = self._after(before)
+			return None if after == "" else after
+		afters = self._afters(before) or [before] * len(self._members)
+		after = before
+		for (_, slug), left in zip(self._members, afters):
+			unit["f_"+slug+"_before"] = after
+			unit["f_"+slug+"_after"] = left
+			# as if tagged, which had it been left empty would have
+			# discarded the unit, as the merged removal does below
+			unit["t_"+slug+"_match"] = True
+			after = left
+		unit["f_"+self.slug+"_before"] = before
+		unit["f_"+self.slug+"_after"] = after
+		unit["val"] = after
+		return None if after == "" else unit
+
+	def _process_batch(self, units):
+		if self._tag:
+			return [self._process(u) for u in units]
+		after = self._after
+		return [after(u if type(u) == str else u["val"]) or None for u in units]
+
+	def _process_vals(self, vals):
+		if self._tag:
+			return NotImplemented
+		after = self._after
+		return [after(v) or None for v in vals]
+
+
+def _first_chars(regex):
+	# character class items (as regex source) that a match must start
+	# with, or None if unknown, e.g. may be empty or uses categories
+	if regex.flags & re.IGNORECASE or not isinstance(regex.pattern, str):
+		return None
+	try:
+		return _first_of(sre_parse.parse(regex.pattern, regex.flags))
+	except Exception:
+		return None
+
+
+def _first_of(items):
+	if len(items) == 0:
+		return None
+	op, av = items[0]
+	name = str(op)
+	if name == "LITERAL":
+		return {re.escape(chr(av))}
+	if name == "IN":
+		chars = set()
+		for iop, iav in av:
+			iname = str(iop)
+			if iname == "LITERAL":
+				chars.add(re.escape(chr(iav)))
+			elif iname == "RANGE":
+				chars.add(re.escape(chr(iav[0])) + "-" + re.escape(chr(iav[1])))
+			else:
+				return None
+		return chars
+	if name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"):
+		return _first_of(av[2]) if av[0] > 0 else None
+	if name == "SUBPATTERN":
+		return _first_of(av[-1])
+	if name == "BRANCH":
+		branches = [_first_of(b) for b in av[1]]
+		return None if None in branches else set().union(*branches)
+	return None
+
+
 class PunctRemoval(BasicTube):
 
+	pure = True
+	_unwraps = True
+
 	def __init__(self, slug="punctrem", **kwargs):
 		super().__init__(slug=slug, **kwargs)
 		self._f1 = RegexRemoval(r'[^\w0-9\'/-]+', slug=slug+"f1", **kwargs)
@@ -193,33 +526,58 @@ class PunctRemoval(BasicTube):
 
 
 	def _process(self, unit):
-		try:
-			# wrap unit in list to convert to generator so it can be piped
-			return next(self._f3.pipe(
-						self._f2.pipe(
-						self._f1.pipe(
-							[unit]
-						))))
-		except StopIteration:
-			return None
+		if self._plain():
+			# single pass: inner runs, then leading and trailing ones
+			v = unit if type(unit) == str else unit["val"]
+			return self._f1.regex.sub('', v).strip("'/-") or None
+		# otherwise go through each stage as if piped
+		for f in (self._f1, self._f2, self._f3):
+			unit = f._step(unit)
+			if unit is None:
+				return None
+		return unit
+
+	def _process_batch(self, units):
+		if not self._plain():
+			return super()._process_batch(units)
+		sub = self._f1.regex.sub
+		return [sub('', u if type(u) == str else u["val"]).strip("'/-") or None for u in units]
+
+	def _process_vals(self, vals):
+		if not self._plain():
+			return NotImplemented
+		sub = self._f1.regex.sub
+		return [sub('', v).strip("'/-") or None for v in vals]
+
+	def _plain(self):
+		# stages neither tag nor keep what they empty, so the unit
+		# just goes out as a string, or not at all if nothing is left
+		return self._discard and not self._inverse and not self._tag
 
 
 class DictFilter(BasicTube):
 
-	def __init__(self, exclusion=None, file=None, ignore_case=True, slug="dict", **kwargs):
+	pure = True
+
+	def __init__(self, exclusion=None, file=None, ignore_case=True, mapped=False, fold_accents=False, slug="dict", **kwargs):
 
 		self._ignore_case = ignore_case
+		# shared by every filter in the same mode
+		self._key = lexicons.normalizer(ignore_case, fold_accents)
 
 		if file is not None:
-			with open(file) as f:
-				if ignore_case:
-					self._exclusion = set(l.strip().lower() for l in f if l.strip())
-				else:
-					self._exclusion = set(l.strip() for l in f if l.strip())
+			# shared with every other filter using the same file,
+			# and loaded on first lookup (see lexicons.preload)
+			# if mapped, from a binary image compiled on first use
+			self._lexicon = lexicons.get_lexicon(file, ignore_case, mapped, fold_accents)
+			# the loaded set (or mapped image) is kept here for lookups
+			# until the lexicon is evicted, see held
+			self._exclusion = None
 
 		elif exclusion is not None:
-			if ignore_case:
-				self._exclusion = set(e.lower() for e in exclusion)
+			self._lexicon = None
+			if self._key is not None:
+				self._exclusion = set(map(self._key, exclusion))
 			else:
 				self._exclusion = set(exclusion)
 
@@ -230,6 +588,100 @@ class DictFilter(BasicTube):
 
 	def _process(self, unit):
 		v = unit if type(unit) == str else unit["val"]
-		if self._ignore_case:
-			v = v.lower()
-		return None if v in self._exclusion else unit
+		if self._key is not None:
+			v = self._key(v)
+		exclusion = self._exclusion
+		if exclusion is None:
+			exclusion = self._words()
+		return None if v in exclusion else unit
+
+	def preload(self):
+		self._words()
+
+	def _words(self):
+		# the set (or mapped image) itself, loading it if needed
+		exclusion = self._exclusion
+		if exclusion is None:
+			exclusion = self._lexicon.hold(self)
+		return exclusion
+
+	def held(self, words):
+		# called by the lexicon with its words, or None once evicted
+		self._exclusion = words
+
+	def __getstate__(self):
+		# lexicons are loaded again in the process this ends up in
+		state = self.__dict__.copy()
+		if self._lexicon is not None:
+			state["_exclusion"] = None
+		return state
+
+	def _process_batch(self, units):
+		exclusion = self._words()
+		if not _only_str(units):
+			return super()._process_batch(units)
+		if self._key is not None:
+			key = self._key
+			return [None if key(u) in exclusion else u for u in units]
+		return [None if u in exclusion else u for u in units]
+
+	def _process_vals(self, vals):
+		return self._process_batch(vals)
+
+
+class MultiDictFilter(BasicTube):
+
+	pure = True
+
+	# merges several DictFilters into a single index, mapping each word
+	# to a bitmask of the dictionaries that contain it, so a unit is
+	# normalized and looked up just once per mode instead of once per dictionary
+	# the filters are still applied in order as if piped one after
+	# the other, each one with its own slug, tag, discard and inverse
+
+	def __init__(self, filters, slug="multidict"):
+		if len(filters) == 0:
+			raise InputError("At least one DictFilter is needed")
+		self._index = {}
+		self._members = []
+		# mask of the dictionaries in each normalization mode
+		modes = {}
+		for bit, f in enumerate(filters):
+			if not isinstance(f, DictFilter):
+				raise InputError("Only DictFilters can be merged")
+			flag = 1 << bit
+			for w in f._words():
+				self._index[w] = self._index.get(w, 0) | flag
+			modes[f._key] = modes.get(f._key, 0) | flag
+			tag = "t_"+f.slug+"_match" if f._tag else None
+			self._members.append((flag, f._discard, f._inverse, tag))
+		self._modes = list(modes.items())
+		# the key when all of them share the same mode
+		self._key = self._modes[0][0]
+		self._mixed = len(self._modes) > 1
+		super().__init__(slug=slug)
+
+	def _process(self, unit):
+		v = unit if type(unit) == str else unit["val"]
+		if not self._mixed:
+			key = self._key
+			mask = self._index.get(v if key is None else key(v), 0)
+		else:
+			mask = 0
+			for key, m in self._modes:
+				mask |= self._index.get(v if key is None else key(v), 0) & m
+		for flag, discard, inverse, tag in self._members:
+			# a DictFilter lets the unit through if it is not in it
+			kept = not (mask & flag)
+			# same as in BasicTube.pipe
+			if discard and not (inverse ^ kept):
+				return None
+			if tag is not None:
+				unit[tag] = kept
+		return unit
+
+	def _process_vals(self, vals):
+		# members' tags would need the columns
+		if any(tag is not None for _, _, _, tag in self._members):
+			return NotImplemented
+		return [self._process(v) for v in vals]
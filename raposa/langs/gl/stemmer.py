@@ -1,4 +1,5 @@
-from ...core.stemming.rule import Rule
+from ...core.cache import LRUCache
+from ...core.stemming.rule import Rule, RuleIndex
 
 class GLSimpleStemmer():
 
@@ -8,56 +9,81 @@ class GLSimpleStemmer():
     # this implementation uses Rules, though
     # but the algorithm and rules are the same
 
-    def __init__(self):
-          self.suffixes = []
-          self.s = ""
+    # all working state is kept in local variables, so
+    # a single stemmer can be shared by threads or tasks
+
+    def __init__(self, cache_size=None):
           self.m = str.maketrans('áéíóúêô', 'aeioueo')
+          # words are Zipfian, so caching the most frequent ones
+          # saves running every rule block again and again
+          self.cache = LRUCache(cache_size) if cache_size else None
 
 
-    def _try_rule_block(self, rules, add=True):
-        for rule in rules:
-            success, m, result = rule.try_regress(self.s)
+    def _try_rule_block(self, index, s, suffixes, add=True):
+        for rule in index.candidates(s):
+            # many may come, take just the first
+            success, m, result = rule.regress_first(s)
             if success:
                 if add: # avoid adding ortographic stuff
-                    self.suffixes.append(m)
-                # many may come back, take just the first
-                self.s = list(result)[0]
-                return True
-        return False
+                    suffixes.append(m)
+                return True, result
+        return False, s
 
 
-    def _remove_accents(self):
-        self.s = self.s.translate(self.m)
+    def _remove_accents(self, s):
+        return s.translate(self.m)
 
 
     def stem(self, unit):
+        if self.cache is None:
+            return self._stem(unit)
+        key = unit.lower()
+        chain = self.cache.get(key)
+        if chain is None:
+            chain = tuple(self._stem(key))
+            self.cache.put(key, chain)
+        return list(chain)
+
+
+    def stem_many(self, units):
+        # stems each distinct word just once
+        # and gives back a chain for every input, in order
+        units = [u.lower() for u in units]
+        chains = {}
+        for u in units:
+            if u not in chains:
+                chains[u] = tuple(self.stem(u))
+        return [list(chains[u]) for u in units]
+
+
+    def _stem(self, unit):
 
-        self.s = unit.lower()
-        self.suffixes = []
+        s = unit.lower()
+        suffixes = []
 
-        if self.s.endswith("s") and len(self.s) >= 3:
-           self._try_rule_block(PLURALS)
+        if s.endswith("s") and len(s) >= 3:
+           _, s = self._try_rule_block(PLURALS_INDEX, s, suffixes)
 
-        self._try_rule_block(UNIFICATION, add=False)
-        self._try_rule_block(ADVERBS)
+        _, s = self._try_rule_block(UNIFICATION_INDEX, s, suffixes, add=False)
+        _, s = self._try_rule_block(ADVERBS_INDEX, s, suffixes)
 
         changes = True
         while (changes):
-           changes = self._try_rule_block(AUGMENTATIVES)
+           changes, s = self._try_rule_block(AUGMENTATIVES_INDEX, s, suffixes)
 
-        changes = self._try_rule_block(NOUNS)
+        changes, s = self._try_rule_block(NOUNS_INDEX, s, suffixes)
         if not changes:
-            self._try_rule_block(VERBS)
+            _, s = self._try_rule_block(VERBS_INDEX, s, suffixes)
 
-        self._try_rule_block(THEMATIC)
-        self._remove_accents()
+        _, s = self._try_rule_block(THEMATIC_INDEX, s, suffixes)
+        s = self._remove_accents(s)
 
-        chain = [self.s] + list(reversed(self.suffixes))
+        chain = [s] + list(reversed(suffixes))
 
         # loop on the first element
         # this is the only extra thing added from the original
-        if (self.s != unit.lower()):
-           new_chain = self.stem(self.s)
+        if (s != unit.lower()):
+           new_chain = self.stem(s)
            chain = new_chain + chain[1:]
 
         return chain
@@ -469,4 +495,16 @@ THEMATIC = [
     Rule("é", 3, "", []),
     Rule("ó", 3, "", []),
     Rule("i", 3, "", []),
-]
\ No newline at end of file
+]
+
+
+## INDEXES BY SUFFIX
+## so each block only tries the rules that may apply
+
+PLURALS_INDEX = RuleIndex(PLURALS)
+UNIFICATION_INDEX = RuleIndex(UNIFICATION)
+ADVERBS_INDEX = RuleIndex(ADVERBS)
+AUGMENTATIVES_INDEX = RuleIndex(AUGMENTATIVES)
+NOUNS_INDEX = RuleIndex(NOUNS)
+VERBS_INDEX = RuleIndex(VERBS)
+THEMATIC_INDEX = RuleIndex(THEMATIC)
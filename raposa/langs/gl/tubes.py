@@ -51,15 +51,29 @@ class GLWikipediaFilter(DictFilter):
 
 class GLStemmerFilter(BasicTube):
 
-	def __init__(self, slug="gl_stemmer", discard=False, replace=False, **kwargs):
-		self._stemmer = GLSimpleStemmer()
+	pure = True
+
+	def __init__(self, slug="gl_stemmer", discard=False, replace=False, cache_size=10000, **kwargs):
+		# cache_size=None disables caching stems
+		self._stemmer = GLSimpleStemmer(cache_size=cache_size)
 		self._replace = replace
 		super().__init__(slug=slug, discard=discard, **kwargs)
 
+	@property
+	def cache(self):
+		# e.g. for its stats, or to save/load it between runs
+		return self._stemmer.cache
+
 
 	def _process(self, unit):
 		v = unit if type(unit) == str else unit["val"]
-		chain = self._stemmer.stem(v)
+		return self._apply(unit, self._stemmer.stem(v))
+
+	def _process_batch(self, units):
+		chains = self._stemmer.stem_many(u if type(u) == str else u["val"] for u in units)
+		return [self._apply(u, chain) for u, chain in zip(units, chains)]
+
+	def _apply(self, unit, chain):
 		if self._tag:
 			unit["t_"+self.slug+"_val"] = chain
 		if self._replace:
@@ -1,4 +1,4 @@
-from distutils.core import setup
+from setuptools import setup, find_namespace_packages
 
 setup(
     name = 'raposa',
@@ -45,11 +45,18 @@ setup(
         "Topic :: Text Processing :: Linguistic" \
     ],
     license='MIT',
-    python_requires='>=3.5',
+    python_requires='>=3.7',
     install_requires=[
         'nltk',
         'emoji',
         'exrex'
     ],
-    packages=find_packages(exclude=[]), # add if necessary
+    packages=find_namespace_packages(include=['raposa', 'raposa.*']),
+    package_data={
+        'raposa.langs.gl': ['data/*.dat'],
+        'raposa.langs.es': ['data/*.dat']
+    },
+    entry_points={
+        'console_scripts': ['raposa=raposa.cli:main']
+    },
 )
\ No newline at end of file
@@ -0,0 +1,132 @@
+import random
+
+from raposa.core.tubes import UrlRemoval, MentionRemoval, HashtagRemoval, RegexRemoval, NumberRemoval, \
+    MultiRegexRemoval, ValAdaptor
+
+
+def removals():
+    return [UrlRemoval(), MentionRemoval(), HashtagRemoval(), RegexRemoval(r'[ºª]+'), NumberRemoval()]
+
+
+def piped(tubes, units):
+    for t in tubes:
+        units = list(t.pipe(units))
+    return units
+
+
+def texts(n, seed=1):
+    # short texts made of what the removals look for, so their
+    # matches often overlap and removing one brings others together
+    rnd = random.Random(seed)
+    alphabet = "@#hx:/.com1ºa ,b"
+    return ["".join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 20))) for _ in range(n)]
+
+
+def test_merged_removals_as_piped():
+    for n in (3, 5):
+        merged = MultiRegexRemoval(removals()[:n])
+        for t in texts(5000) + ['@http://x.com', '1x.com#@,@a', '#https://@#x.com@b/']:
+            assert list(merged.pipe([t])) == piped(removals()[:n], [t]), t
+
+
+def test_merged_removals_in_batches_as_piped():
+    merged = MultiRegexRemoval(removals())
+    units = texts(2000)
+    expected = piped(removals(), units)
+    out, keep = merged.pipe_batch(units)
+    assert [u for u, k in zip(out, keep) if k] == expected
+
+
+def test_merged_removals_tagged_as_piped():
+    merged = MultiRegexRemoval(removals()[:3], tag=True)
+    for t in texts(2000, seed=2):
+        expected = piped(removals()[:3], [t])
+        out = piped([ValAdaptor(), merged], [t])
+        assert [u["val"] for u in out] == expected, t
+        for u in out:
+            assert u["f_multirem_before"] == t
+            assert all(u["t_"+r.slug+"_match"] for r in removals()[:3])
+
+
+def test_columns_as_piped():
+    from raposa.core.pipeline import BasicPipeline
+    from raposa.core.tokenizers import WhitespaceTokenizer
+    from raposa.core.tubes import PunctRemoval, EmojiRemoval, NumberFilter, LowercaseAdaptor, DictFilter
+    lines = ["Ola mundo x", "12 @a #b ºª", "-'- 1,5 🙂 casa", "", "a-b http://x.com 7"]
+    makers = [
+        lambda: [NumberRemoval()],
+        lambda: [RegexRemoval(r'[aeiou]+')],
+        lambda: [PunctRemoval()],
+        lambda: [EmojiRemoval()],
+        lambda: [MultiRegexRemoval(removals())],
+        lambda: [LowercaseAdaptor(), DictFilter(["ola", "casa"])],
+    ]
+    for make in makers:
+        for before in ([], [ValAdaptor()], [ValAdaptor(), NumberFilter(tag=True, discard=False)]):
+            tubes = before + make()
+            piped = list(BasicPipeline(tubes=tubes, tokenizer=WhitespaceTokenizer()).pipe(lines))
+            columns = BasicPipeline(tubes=before + make(), tokenizer=WhitespaceTokenizer()).pipe_columns(lines)
+            assert columns.to_units(alive_only=True) == piped, tubes
+
+
+def test_compiled_removals_as_piped():
+    from raposa.core.pipeline import BasicPipeline
+    from raposa.core.tokenizers import WhitespaceTokenizer
+    from raposa.core.tubes import PunctRemoval
+    lines = texts(2000, seed=3)
+    makers = [
+        lambda: removals(),
+        lambda: [ValAdaptor()] + removals(),
+        lambda: removals()[:2] + [PunctRemoval()] + removals()[2:],
+        lambda: removals()[:3] + [ValAdaptor(), RegexRemoval(r"[ºª]+", tag=True), NumberRemoval()],
+        lambda: [RegexRemoval(r'(a)\1'), RegexRemoval(r'[ºª]+'), NumberRemoval()],
+    ]
+    for make in makers:
+        piped = list(BasicPipeline(tubes=make(), tokenizer=WhitespaceTokenizer()).pipe(lines))
+        compiled = list(BasicPipeline(tubes=make(), tokenizer=WhitespaceTokenizer(), compiled=True).pipe(lines))
+        assert compiled == piped
+
+
+def test_dict_filter_after_eviction(tmp_path):
+    import pickle
+    from raposa.core import lexicons
+    from raposa.core.tubes import DictFilter
+    path = tmp_path / "words.txt"
+    path.write_text("casa\nmundo\n", encoding="utf-8")
+    f = DictFilter(file=str(path))
+    assert list(f.pipe(["casa", "ola"])) == ["ola"]
+    path.write_text("ola\n", encoding="utf-8")
+    lexicons.evict(str(path))
+    assert list(f.pipe(["casa", "ola"])) == ["casa"]
+    g = pickle.loads(pickle.dumps(f))
+    assert g._exclusion is None
+    assert list(g.pipe(["casa", "ola"])) == ["casa"]
+
+
+def test_parallel_pipelines_at_once():
+    import pytest
+    from raposa.core.pipeline import BasicPipeline
+    from raposa.core.tubes import InputError
+    lines = texts(300, seed=4)
+    first = BasicPipeline(tubes=removals()[:2])
+    second = BasicPipeline(tubes=removals()[2:])
+    a, b = first.pipe(lines, workers=2, chunk_size=10), second.pipe(lines, workers=2, chunk_size=10)
+    # both pools running, taking turns
+    out_a, out_b = [next(a)], [next(b)]
+    out_a += list(a)
+    out_b += list(b)
+    assert out_a == list(first.pipe(lines))
+    assert out_b == list(second.pipe(lines))
+    with pytest.raises(InputError):
+        list(BasicPipeline(tubes=removals(), reads_from_gen=False).pipe("a b", workers=2))
+
+
+def test_advanced_tags_after_removal():
+    from raposa.core.advanced.premade import AdvancedPipeline
+    from raposa.core.tokenizers import WhitespaceTokenizer, RegexTokenizer
+    from raposa.core.tubes import PunctRemoval, DictFilter, LowercaseAdaptor
+    for compiled in (False, True):
+        p = AdvancedPipeline([PunctRemoval(), LowercaseAdaptor(), DictFilter(["casa"], tag=True, discard=False), NumberRemoval()],
+            unit_tokenizer=WhitespaceTokenizer(), ctxt_tokenizer=RegexTokenizer(r'[.!]'), compiled=compiled)
+        out = [(r.unit["val"], r.unit["t_dict_match"], r.unit.as_is) for r in p.pipe(["Ola, mundo. A casa 12!"])]
+        assert out == [("ola", True, "Ola,"), ("mundo", True, "mundo"), ("a", True, "A"), ("casa", False, "casa")]